@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+__author__ = "bibow"
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """Coalesces concurrent submissions into batches run by one worker thread.
+
+    ``submit`` queues an item under a key and returns a Future. The worker
+    takes the first queued item; if nothing else is queued it is flushed at
+    once, otherwise the worker keeps collecting for ``interval`` seconds or
+    until ``max_batch_size`` items are queued. It then groups the items by
+    key and hands each group to a pool of ``max_workers`` threads, which
+    calls ``handler(key, items)``. Groups of different keys are flushed in
+    parallel; groups of the same key are flushed one after another, in the
+    order they were collected. The handler returns one result per item, in
+    order; an Exception instance in that list fails only the matching
+    Future.
+
+    With ``max_pending`` set, a full queue blocks ``submit``, or makes it
+    raise ``queue.Full`` when called with ``block=False``.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Hashable, List[Any]], List[Any]],
+        interval: float = 0.01,
+        max_batch_size: int = 20,
+        name: str = "mcp-batcher",
+        max_pending: int = 0,
+        max_workers: int = 8,
+    ):
+        self._handler = handler
+        self._interval = interval
+        self._max_batch_size = max_batch_size
+        self._name = name
+        self._queue: "queue.Queue[Tuple[Hashable, Any, Future]]" = queue.Queue(
+            maxsize=max_pending
+        )
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-flush"
+        )
+        # Last flush scheduled per key, so a key's batches stay in order
+        self._tails: Dict[Hashable, Future] = {}
+        self._logger = logging.getLogger(__name__)
+
+    def submit(self, key: Hashable, item: Any, block: bool = True) -> Future:
+        """Queue an item for the next batch of its key"""
+        future: Future = Future()
+        self._queue.put((key, item, future), block=block)
+        self._ensure_started()
+        return future
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=self._name, daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[Hashable, Any, Future]]:
+        batch = [self._queue.get()]
+        try:
+            batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            # A lone item is flushed without waiting out the interval
+            return batch
+
+        deadline = time.monotonic() + self._interval
+
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            groups: Dict[Hashable, List[Tuple[Any, Future]]] = {}
+            for key, item, future in self._collect():
+                groups.setdefault(key, []).append((item, future))
+
+            for key, entries in groups.items():
+                self._schedule(key, entries)
+
+    def _schedule(self, key: Hashable, entries: List[Tuple[Any, Future]]) -> None:
+        with self._lock:
+            previous = self._tails.get(key)
+            flush = self._tails[key] = self._executor.submit(
+                self._flush, key, entries, previous
+            )
+        flush.add_done_callback(lambda done: self._release(key, done))
+
+    def _release(self, key: Hashable, done: Future) -> None:
+        with self._lock:
+            if self._tails.get(key) is done:
+                del self._tails[key]
+
+    def _flush(
+        self,
+        key: Hashable,
+        entries: List[Tuple[Any, Future]],
+        previous: Optional[Future] = None,
+    ) -> None:
+        if previous is not None:
+            # Submitted earlier, so it is already running or done
+            wait([previous])
+
+        try:
+            results = self._handler(key, [item for item, _ in entries])
+        except Exception as e:
+            self._logger.warning("Batch of %d failed: %s", len(entries), e)
+            for _, future in entries:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(entries, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -10,11 +10,15 @@ import asyncio
 import json
 import logging
 import os
+import pickle
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import boto3
+import fastjsonschema
+import orjson
 from passlib.context import CryptContext
 from pydantic import AnyUrl
 
@@ -87,6 +91,67 @@ MCP_SETTING = """query mcpSetting($settingId: String!) {
 _pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+def _parse_graphql_response(response: Any) -> Dict[str, Any]:
+    """Parse an MCP core response; the body is only decoded when it is still
+    a JSON document"""
+    body = response.get("body", response) if isinstance(response, dict) else response
+    if isinstance(body, (str, bytes)):
+        return orjson.loads(body)
+    if isinstance(body, dict):
+        return body
+    return Serializer.json_loads(body)
+
+
+def freeze_value(value: Any, top_level_copied: bool = False) -> Tuple[bool, Any]:
+    """
+    Snapshot of a cached value that every caller gets its own copy of.
+
+    Containers are pickled once and rebuilt by ``thaw_value``; with
+    ``top_level_copied`` (the caller unpacks the dict with ``**``) only
+    nested containers force the pickle.
+    """
+    values = value.values() if top_level_copied and isinstance(value, dict) else None
+    if values is not None:
+        mutable = any(isinstance(item, (dict, list)) for item in values)
+    else:
+        mutable = isinstance(value, (dict, list))
+    if mutable:
+        return True, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return False, value
+
+
+def thaw_value(snapshot: Tuple[bool, Any]) -> Any:
+    pickled, value = snapshot
+    return pickle.loads(value) if pickled else value
+
+
+def _argument_plan(schema: Dict[str, Any]) -> Any:
+    """
+    Defaults template of a (nested) argument schema, built once per schema.
+
+    Objects become ("object", ((key, required, default, plan), ...)) with the
+    default frozen by ``freeze_value`` or None, arrays become ("array",
+    plan) and anything else None.
+    """
+    if schema.get("type") == "object" and "properties" in schema:
+        required = set(schema.get("required", []))
+        return (
+            "object",
+            tuple(
+                (
+                    key,
+                    key in required,
+                    freeze_value(nested["default"]) if "default" in nested else None,
+                    _argument_plan(nested),
+                )
+                for key, nested in schema["properties"].items()
+            ),
+        )
+    if schema.get("type") == "array" and "items" in schema:
+        return ("array", _argument_plan(schema["items"]))
+    return None
+
+
 @dataclass
 class LocalUser:
     username: str
@@ -172,14 +237,34 @@ class Config:
     transport = None
     port = None
     mcp_configuration = {}
+    # partition_key -> (configuration, dispatch indexes built from it)
+    mcp_dispatch: Dict[str, tuple] = {}
+    _configuration_locks: Dict[str, threading.Lock] = {}
+    _configuration_locks_guard = threading.Lock()
+    # Partitions whose configuration has been requested in the background;
+    # a key is dropped with its cached configuration
+    _prewarmed_partitions: set[str] = set()
+    _prewarmed_partitions_lock = threading.Lock()
     funct_bucket_name = None
     funct_zip_path = None
     funct_extract_path = None
+    tool_poll_timeout = 3.0
+    tool_pool_size = 32
+    tool_completion_topic_arn = None
+    tool_completion_queue_url = None
+    lambda_batch_deadline = 840.0
+    prewarm_partition_keys: List[str] = []
+    config_refresh_seconds = 0.0
+    sync_call_writes = False
+    tracking_enabled = True
+    strict_argument_validation = False
     logger = None
     mcp_core = None
     aws_s3 = None
     aws_cognito_idp = None
     aws_lambda = None
+    aws_sns = None
+    aws_sqs = None
 
     # ----------------- universal -----------------
     auth_provider: str | None = None  # "local" | "cognito" | "api_gateway"
@@ -255,6 +340,24 @@ class Config:
         cls.cognito_app_client_id = setting.get("cognito_app_client_id", None)
         cls.cognito_app_secret = setting.get("cognito_app_secret", None)
         cls.jwks_cache_ttl = int(setting.get("jwks_cache_ttl", 3600))
+        cls.tool_poll_timeout = float(setting.get("tool_poll_timeout", 3.0))
+        cls.tool_pool_size = int(setting.get("tool_pool_size", 32))
+        cls.tool_completion_topic_arn = setting.get("tool_completion_topic_arn")
+        cls.tool_completion_queue_url = setting.get("tool_completion_queue_url")
+        cls.lambda_batch_deadline = float(setting.get("lambda_batch_deadline", 840))
+        cls.config_refresh_seconds = float(setting.get("config_refresh_seconds", 0))
+        cls.sync_call_writes = bool(setting.get("sync_call_writes", False))
+        cls.tracking_enabled = bool(setting.get("tracking_enabled", True))
+        cls.strict_argument_validation = bool(
+            setting.get("strict_argument_validation", False)
+        )
+
+        prewarm_partition_keys = setting.get("prewarm_partition_keys") or []
+        if isinstance(prewarm_partition_keys, str):
+            prewarm_partition_keys = prewarm_partition_keys.split(",")
+        cls.prewarm_partition_keys = [
+            key.strip() for key in prewarm_partition_keys if key.strip()
+        ]
 
         if "cache_enabled" in setting:
             cls.CACHE_ENABLED = setting.get("cache_enabled", True)
@@ -352,6 +455,14 @@ class Config:
 
             if cls.auth_provider == "api_gateway":
                 cls.aws_lambda = boto3.client("lambda", **aws_credentials)
+
+            # Completion notifications for async tool calls: workers publish
+            # to the topic, dispatchers long-poll their own subscribed queue
+            if cls.tool_completion_topic_arn:
+                cls.aws_sns = boto3.client("sns", **aws_credentials)
+
+            if cls.tool_completion_queue_url:
+                cls.aws_sqs = boto3.client("sqs", **aws_credentials)
         except Exception as e:
             logger.exception("Failed to initialize AWS services configuration.")
             raise e
@@ -546,6 +657,140 @@ class Config:
         if not force_refresh and cls.mcp_configuration.get(partition_key) is not None:
             return cls.mcp_configuration[partition_key]
 
+        # Single flight: concurrent misses for a partition wait for the fetch
+        # already in progress instead of each issuing their own
+        with cls._configuration_lock(partition_key):
+            if (
+                not force_refresh
+                and cls.mcp_configuration.get(partition_key) is not None
+            ):
+                return cls.mcp_configuration[partition_key]
+
+            return cls._load_mcp_configuration(partition_key)
+
+    @classmethod
+    def fetch_mcp_dispatch(
+        cls,
+        partition_key: str,
+        force_refresh: bool = False,
+    ) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        """
+        Fetches the MCP configuration and returns dict indexes over it.
+
+        The indexes are built once per cached configuration and rebuilt
+        whenever the configuration is refreshed, so every tool/resource/prompt
+        dispatch resolves its entries with dict lookups.
+
+        Args:
+            partition_key: ID of the partition_key to fetch configuration from
+            force_refresh: If True, bypass cache and fetch fresh data
+
+        Returns:
+            Dict with "tools" and "prompts" keyed by name, "resources" keyed
+            by uri, "module_links" keyed by (name, type), "modules" keyed
+            by (module_name, class_name), "module_settings" holding the
+            normalized setting of each module, "argument_plans" holding the
+            defaults template of each tool, "validators" holding the compiled
+            input schema of each tool and "prompt_arguments" holding the
+            required argument names of each prompt
+        """
+        config = cls.fetch_mcp_configuration(partition_key, force_refresh=force_refresh)
+
+        cached = cls.mcp_dispatch.get(partition_key)
+        if cached is not None and cached[0] is config:
+            return cached[1]
+
+        if not isinstance(config, dict):
+            config = {}
+
+        dispatch = {
+            "tools": {tool["name"]: tool for tool in config.get("tools", [])},
+            "resources": {
+                resource["uri"]: resource for resource in config.get("resources", [])
+            },
+            "prompts": {
+                prompt["name"]: prompt for prompt in config.get("prompts", [])
+            },
+            "module_links": {
+                (module_link["name"], module_link["type"]): module_link
+                for module_link in config.get("module_links", [])
+            },
+            "modules": {
+                (module["module_name"], module["class_name"]): module
+                for module in config.get("modules", [])
+            },
+            "module_settings": {
+                (module["module_name"], module["class_name"]): freeze_value(
+                    Serializer.json_normalize(module.get("setting") or {}),
+                    top_level_copied=True,
+                )
+                for module in config.get("modules", [])
+            },
+            "argument_plans": {
+                tool["name"]: _argument_plan(
+                    {
+                        "type": "object",
+                        "properties": tool["inputSchema"]["properties"],
+                        "required": tool["inputSchema"].get("required", []),
+                    }
+                )
+                for tool in config.get("tools", [])
+                if (tool.get("inputSchema") or {}).get("properties")
+            },
+            "validators": {},
+            "prompt_arguments": {
+                prompt["name"]: tuple(
+                    argument["name"]
+                    for argument in prompt.get("arguments") or []
+                    if argument.get("required", False)
+                )
+                for prompt in config.get("prompts", [])
+            },
+        }
+        for tool in config.get("tools", []):
+            validator = cls._compile_input_schema(tool)
+            if validator is not None:
+                dispatch["validators"][tool["name"]] = validator
+
+        cls.mcp_dispatch[partition_key] = (config, dispatch)
+        return dispatch
+
+    @classmethod
+    def _compile_input_schema(cls, tool: Dict[str, Any]) -> Any:
+        """
+        Compiles a tool's input schema into a validator function.
+
+        The validator checks the full schema (types, enums, formats,
+        additionalProperties) and fills in defaults in place, so it rejects
+        arguments the interpretive validator lets through. It is only used
+        when strict_argument_validation is enabled. Returns None otherwise,
+        for tools without properties, or when the schema cannot be compiled,
+        in which case the interpretive validator is used instead.
+        """
+        if not cls.strict_argument_validation:
+            return None
+
+        input_schema = tool.get("inputSchema") or {}
+        if not input_schema.get("properties"):
+            return None
+
+        try:
+            return fastjsonschema.compile(input_schema)
+        except Exception as e:
+            if cls.logger:
+                cls.logger.warning(
+                    f"Failed to compile input schema for tool {tool.get('name')}: {e}"
+                )
+            return None
+
+    @classmethod
+    def _configuration_lock(cls, partition_key: str) -> threading.Lock:
+        with cls._configuration_locks_guard:
+            return cls._configuration_locks.setdefault(partition_key, threading.Lock())
+
+    @classmethod
+    def _load_mcp_configuration(cls, partition_key: str) -> Dict[str, Any]:
+        """Fetch the MCP configuration of a partition and store it in the cache."""
         if cls.logger:
             cls.logger.info(
                 f"Fetching MCP configuration for partition_key: {partition_key}"
@@ -560,7 +805,7 @@ class Config:
                 query=MCP_FUNCTION_LIST,
                 variables={},
             )
-            response = Serializer.json_loads(response.get("body", response))
+            response = _parse_graphql_response(response)
 
             if "data" in response:
                 response = response.get("data", {})
@@ -706,9 +951,7 @@ class Config:
                     query=MCP_MODULE,
                     variables={"moduleName": module_name},
                 )
-                module_response = Serializer.json_loads(
-                    module_response.get("body", module_response)
-                )
+                module_response = _parse_graphql_response(module_response)
 
                 if "errors" in module_response:
                     if cls.logger:
@@ -766,8 +1009,8 @@ class Config:
                             query=MCP_SETTING,
                             variables={"settingId": class_info["setting_id"]},
                         )
-                        setting_response = Serializer.json_loads(
-                            setting_response.get("body", setting_response)
+                        setting_response = _parse_graphql_response(
+                            setting_response
                         )
 
                         if "errors" in setting_response:
@@ -827,17 +1070,35 @@ class Config:
         """Force refresh of MCP configuration for an partition_key."""
         return cls.fetch_mcp_configuration(partition_key, force_refresh=True)
 
+    @classmethod
+    def claim_prewarm(cls, partition_key: str) -> bool:
+        """True for the one caller that should prewarm an uncached partition"""
+        with cls._prewarmed_partitions_lock:
+            if (
+                partition_key in cls._prewarmed_partitions
+                or cls.mcp_configuration.get(partition_key) is not None
+            ):
+                return False
+            cls._prewarmed_partitions.add(partition_key)
+            return True
+
     @classmethod
     def clear_mcp_configuration_cache(cls, partition_key: str = None):
         """Clear MCP configuration cache for specific partition_key or all partition_keys."""
         if partition_key:
             cls.mcp_configuration.pop(partition_key, None)
+            cls.mcp_dispatch.pop(partition_key, None)
+            with cls._prewarmed_partitions_lock:
+                cls._prewarmed_partitions.discard(partition_key)
             if cls.logger:
                 cls.logger.info(
                     f"Cleared MCP configuration cache for partition_key: {partition_key}"
                 )
         else:
             cls.mcp_configuration.clear()
+            cls.mcp_dispatch.clear()
+            with cls._prewarmed_partitions_lock:
+                cls._prewarmed_partitions.clear()
             if cls.logger:
                 cls.logger.info("Cleared all MCP configuration cache")
 
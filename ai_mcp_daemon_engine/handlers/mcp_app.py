@@ -15,12 +15,12 @@ import pendulum
 from fastapi import Depends, FastAPI, Header, HTTPException, Request, params
 from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from silvaengine_utility.serializer import Serializer
 
 from .config import Config
 from .mcp_server import list_prompts, list_resources, list_tools, process_mcp_message
-from .sse_manager import sse_manager
+from .sse_manager import ClientChannel, format_sse_event, sse_manager
 
 # === Rate Limiting ===
 request_counts = defaultdict(list)
@@ -95,32 +95,30 @@ def rate_limit_check(client_ip: str, max_requests: int = 100, window_seconds: in
 
 # === SSE Event Generator ===
 async def sse_event_generator(
-    request: Request, client_id: int, username: str, queue: asyncio.Queue
-) -> AsyncGenerator[str, None]:
+    request: Request, client_id: int, username: str, queue: ClientChannel
+) -> AsyncGenerator[bytes, None]:
     """Generate SSE events for connected clients with better error handling"""
     try:
         # Send connection event
-        yield f"event: connected\ndata: {
-            json.dumps(
-                {'client_id': client_id, 'timestamp': pendulum.now('UTC').isoformat()}
-            )
-        }\n\n"
+        yield format_sse_event(
+            {"client_id": client_id, "timestamp": pendulum.now("UTC").isoformat()},
+            event="connected",
+        )
 
         while not await request.is_disconnected():
             try:
-                message = await asyncio.wait_for(queue.get(), timeout=15)
-                data = json.dumps(jsonable_encoder(message))
-                yield f"data: {data}\n\n"
+                # Events are queued already encoded
+                yield await asyncio.wait_for(queue.get(), timeout=15)
             except asyncio.TimeoutError:
                 # Send heartbeat
-                heartbeat = json.dumps(
+                yield format_sse_event(
                     {
                         "client_id": client_id,
                         "timestamp": pendulum.now("UTC").isoformat(),
                         "type": "heartbeat",
-                    }
+                    },
+                    event="heartbeat",
                 )
-                yield f"event: heartbeat\ndata: {heartbeat}\n\n"
             except Exception as e:
                 if Config.logger:
                     Config.logger.error(
@@ -199,9 +197,9 @@ async def get_sse_stream(
     # Handle message replay
     last_event_id = request.headers.get("last-event-id")
     missed_messages = await sse_manager.get_missed_messages(last_event_id)
-    for msg in missed_messages:
+    for event in missed_messages:
         try:
-            await queue.put(msg)
+            queue.put_nowait(event)
         except asyncio.QueueFull:
             if Config.logger:
                 Config.logger.warning(
@@ -226,7 +224,7 @@ async def get_sse_stream(
         },
     }
     try:
-        await queue.put(metadata)
+        queue.put_nowait(format_sse_event(metadata))
     except asyncio.QueueFull:
         await sse_manager.remove_client(client_id, user["username"])
         raise HTTPException(status_code=503, detail="Server too busy")
@@ -243,7 +241,7 @@ async def get_sse_stream(
     )
 
 
-@app.post("/{endpoint_id}/sse")
+@app.post("/{endpoint_id}/sse", response_class=ORJSONResponse)
 async def post_sse_message(
     endpoint_id: str, request: Request, user: Dict = Depends(current_user)
 ) -> Dict:
@@ -266,6 +264,8 @@ async def post_sse_message(
             raise HTTPException(status_code=400, detail="Invalid message format")
 
         response = await process_mcp_message(partition_key, message)
+        # Large tool results take a while to encode; keep the loop serving
+        response = await asyncio.to_thread(jsonable_encoder, response)
 
         # Send to user clients
         delivered = await send_to_user(
@@ -274,7 +274,7 @@ async def post_sse_message(
                 "type": "mcp_activity",
                 "method": message["method"],
                 "request": jsonable_encoder(message),
-                "response": jsonable_encoder(response),
+                "response": response,
                 "timestamp": pendulum.now("UTC").isoformat(),
             },
         )
@@ -284,7 +284,8 @@ async def post_sse_message(
                 f"Failed to deliver message to user {user['username']}"
             )
 
-        return jsonable_encoder(response)
+        # Already encoded; skip FastAPI's response model pass
+        return ORJSONResponse(response)
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON")
@@ -300,7 +301,7 @@ async def post_sse_message(
         }
 
 
-@app.post("/{endpoint_id}/mcp")
+@app.post("/{endpoint_id}/mcp", response_class=ORJSONResponse)
 async def post_mcp_message(
     endpoint_id: str, request: Request, user: Dict = Depends(current_user)
 ) -> Dict:
@@ -324,7 +325,8 @@ async def post_mcp_message(
             raise HTTPException(status_code=400, detail="Invalid message format")
 
         response = await process_mcp_message(partition_key, message)
-        return jsonable_encoder(response)
+        # Large tool results take a while to encode; keep the loop serving
+        return ORJSONResponse(await asyncio.to_thread(jsonable_encoder, response))
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON")
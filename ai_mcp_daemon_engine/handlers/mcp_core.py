@@ -5,7 +5,7 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from graphene import Schema
 from silvaengine_dynamodb_base import BaseModel
@@ -29,10 +29,19 @@ class MCPCore(Graphql):
 
     def mcp_core_graphql(self, **params: Dict[str, Any]) -> Any:
         try:
-            return self.execute(self.__class__.build_graphql_schema(), **params)
+            return self.execute(self.__class__.graphql_schema(), **params)
         except Exception as e:
             raise e
 
+    _schema: Optional[Schema] = None
+
+    @classmethod
+    def graphql_schema(cls) -> Schema:
+        """The schema served by mcp_core_graphql, built once per process"""
+        if MCPCore._schema is None:
+            MCPCore._schema = cls.build_graphql_schema()
+        return MCPCore._schema
+
     @staticmethod
     def build_graphql_schema() -> Schema:
         return Schema(
@@ -39,7 +39,7 @@ def load_mcp_configuration_into_models(
         from ..models.mcp_function import insert_update_mcp_function
         from ..models.mcp_module import insert_update_mcp_module
         from ..models.mcp_setting import insert_update_mcp_setting
-        from .mcp_utility import get_mcp_configuration_by_module
+        from .mcp_utility import clear_function_cache, get_mcp_configuration_by_module
 
         partition_key = info.context["partition_key"]
         info.context["logger"].info(
@@ -49,6 +49,10 @@ def load_mcp_configuration_into_models(
 
         mcp_configuration = None
         if "module_name" in kwargs:
+            if kwargs.get("source"):
+                # The package may have been redeployed; load it afresh
+                clear_function_cache(kwargs.get("package_name"), kwargs["module_name"])
+
             mcp_configuration = get_mcp_configuration_by_module(
                 kwargs.get("package_name"),
                 kwargs["module_name"],
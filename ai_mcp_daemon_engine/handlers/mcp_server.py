@@ -30,6 +30,7 @@ from .mcp_utility import (
     execute_resource_function,
     execute_tool_function,
     get_mcp_configuration_with_retry,
+    get_mcp_dispatch_with_retry,
 )
 
 # === FastAPI and MCP Initialization ===
@@ -61,24 +62,13 @@ async def call_tool(
     partition_key: str = "default",
 ) -> Sequence[Union[TextContent, ImageContent, EmbeddedResource]]:
     """Call a specific tool with given arguments"""
-    config = get_mcp_configuration_with_retry(partition_key)
+    dispatch = get_mcp_dispatch_with_retry(partition_key)
     name = str(name).strip()
 
-    if (
-        not isinstance(config, dict)
-        or not isinstance(config.get("tools"), list)
-        or not any(tool.get("name") == name for tool in config.get("tools", []))
-    ):
+    if name not in dispatch["tools"]:
         raise ValueError(f"Unknown tool: {name}")
 
-    module_link = next(
-        (
-            module_link
-            for module_link in config.get("module_links", [])
-            if module_link.get("name") == name and module_link.get("type") == "tool"
-        ),
-        {},
-    )
+    module_link = dispatch["module_links"].get((name, "tool"), {})
 
     if module_link.get("is_async", False):
         if partition_key == "default":
@@ -86,7 +76,7 @@ async def call_tool(
                 "Async tools are not supported with default partition_key - please provide a specific partition_key"
             )
 
-        return async_execute_tool_function(partition_key, name, arguments)
+        return await async_execute_tool_function(partition_key, name, arguments)
 
     return execute_tool_function(partition_key, name, arguments)
 
@@ -111,18 +101,9 @@ async def list_resources(partition_key: str = "default") -> List[Resource]:
 @server.read_resource()
 async def read_resource(uri: str, partition_key: str = "default") -> Any:
     """Read content of a specific resource"""
-    from .mcp_utility import get_mcp_configuration_with_retry
-
-    config = get_mcp_configuration_with_retry(partition_key)
     uri = str(uri).strip()
 
-    if (
-        not isinstance(config, dict)
-        or not isinstance(config.get("resources"), list)
-        or not any(
-            resource.get("uri") == uri for resource in config.get("resources", [])
-        )
-    ):
+    if uri not in get_mcp_dispatch_with_retry(partition_key)["resources"]:
         raise ValueError(f"Unknown resource: {uri}")
 
     return execute_resource_function(partition_key, uri)
@@ -160,14 +141,9 @@ async def get_prompt(
     partition_key: str = "default",
 ) -> GetPromptResult:
     """Get a specific prompt with given arguments"""
-    config = get_mcp_configuration_with_retry(partition_key)
     name = str(name).strip()
 
-    if (
-        not isinstance(config, dict)
-        or not isinstance(config.get("prompts"), list)
-        or not any(prompt["name"] == name for prompt in config.get("prompts", []))
-    ):
+    if name not in get_mcp_dispatch_with_retry(partition_key)["prompts"]:
         raise ValueError(f"Unknown prompt: {name}")
 
     return execute_prompt_function(partition_key, name, arguments)
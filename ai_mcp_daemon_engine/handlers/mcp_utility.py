@@ -5,17 +5,31 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import asyncio
+import collections
 import concurrent.futures
+import fcntl
 import functools
+import hashlib
+import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import logging
 import os
+import queue
+import re
+import shutil
 import sys
+import tempfile
 import threading
 import time
 import traceback
+import uuid
 import zipfile
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
-import pendulum
+import fastjsonschema
+import orjson
 from mcp.types import (
     EmbeddedResource,
     GetPromptResult,
@@ -25,41 +39,154 @@ from mcp.types import (
     TextContent,
     TextResourceContents,
 )
+from pydantic import TypeAdapter
 
 from silvaengine_utility import Invoker, Serializer
 
-from .config import Config
+from .batcher import MicroBatcher
+from .config import Config, thaw_value
+from .status_poller import TERMINAL_STATUSES, status_poller
 
-# Global registry to track active background threads
-_active_threads = []
+# SNS rejects messages above 256 KiB; keep headroom for the envelope
+SNS_MESSAGE_LIMIT = 250 * 1024
+# Event invocations are limited to 256 KiB of payload; same headroom
+LAMBDA_EVENT_PAYLOAD_LIMIT = 250 * 1024
+
+# Bounded worker pool for async tool calls, created on first use from
+# Config.tool_pool_size, and the futures it is still running
+_tool_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_tool_pool_lock = threading.Lock()
+_active_futures = set()
+_active_futures_lock = threading.Lock()
+
+
+def _track_future(future: concurrent.futures.Future) -> int:
+    """Track a pooled call until it finishes and return the active count"""
+    with _active_futures_lock:
+        _active_futures.add(future)
+        active = len(_active_futures)
+    future.add_done_callback(_untrack_future)
+    return active
+
+
+def _untrack_future(future: concurrent.futures.Future) -> None:
+    with _active_futures_lock:
+        _active_futures.discard(future)
+
+
+def _active_snapshot() -> tuple:
+    """Consistent copy of the running futures; callbacks may mutate the set
+    while it is being iterated otherwise"""
+    with _active_futures_lock:
+        return tuple(_active_futures)
+
+
+def _get_tool_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _tool_pool
+
+    if _tool_pool is None:
+        with _tool_pool_lock:
+            if _tool_pool is None:
+                _tool_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=Config.tool_pool_size,
+                    thread_name_prefix="mcp-tool",
+                )
+    return _tool_pool
+
+
+# Long-lived event loop per worker thread for async tool functions, so
+# clients they keep on the loop (HTTP sessions, DB pools) are reused across
+# calls, while a tool that blocks only stalls its own thread
+_tool_loops = threading.local()
+
+
+def _get_tool_loop() -> asyncio.AbstractEventLoop:
+    loop = getattr(_tool_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _tool_loops.loop = asyncio.new_event_loop()
+    return loop
+
+
+def _run_on_tool_loop(coroutine: Any) -> Any:
+    return _get_tool_loop().run_until_complete(coroutine)
+
+
+# Threads owning their own tool loops, for callers that are already inside a
+# running loop and so cannot run one on their own thread
+_loop_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_loop_pool_lock = threading.Lock()
+
+
+def _get_loop_pool() -> concurrent.futures.ThreadPoolExecutor:
+    global _loop_pool
+
+    if _loop_pool is None:
+        with _loop_pool_lock:
+            if _loop_pool is None:
+                _loop_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=Config.tool_pool_size,
+                    thread_name_prefix="mcp-tool-loop",
+                )
+    return _loop_pool
+
+
+def _run_tool_coroutine(coroutine: Any) -> Any:
+    """Run an async tool function to completion from synchronous code"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _run_on_tool_loop(coroutine)
+    return _get_loop_pool().submit(_run_on_tool_loop, coroutine).result()
 
 
 def wait_for_background_threads(timeout=30):
-    """Wait for all background threads to complete before shutdown."""
-    if not _active_threads:
+    """Wait for all background tool calls to complete before shutdown."""
+    global _tool_pool
+
+    active = _active_snapshot()
+    if not active:
         return
 
     Config.logger.info(
-        f"Waiting for {len(_active_threads)} background threads to complete..."
+        "Waiting for %d background tool calls to complete...", len(active)
     )
 
-    for thread in _active_threads[
-        :
-    ]:  # Copy list to avoid modification during iteration
-        if thread.is_alive():
-            Config.logger.info(
-                f"Waiting for thread {thread.name if hasattr(thread, 'name') else 'unnamed'}..."
-            )
-            thread.join(timeout=timeout)
-            if thread.is_alive():
-                Config.logger.warning(
-                    f"Thread {thread.name if hasattr(thread, 'name') else 'unnamed'} did not complete within {timeout}s"
-                )
+    _, not_done = concurrent.futures.wait(active, timeout=timeout)
+    if not_done:
+        Config.logger.warning(
+            "%d tool calls did not complete within %ss", len(not_done), timeout
+        )
+
+    with _tool_pool_lock:
+        if _tool_pool is not None:
+            _tool_pool.shutdown(wait=not not_done)
+            _tool_pool = None
 
-    _active_threads.clear()
     Config.logger.info("Background thread cleanup completed")
 
 
+def _json_loads(data: Any) -> Any:
+    """Parse a JSON document on the dispatch path; a response the core has
+    already parsed is returned as is"""
+    if isinstance(data, (str, bytes)):
+        return orjson.loads(data)
+    if isinstance(data, (dict, list)):
+        return data
+    return Serializer.json_loads(data)
+
+
+def _json_dumps(data: Any) -> str:
+    """Serialize on the dispatch path, falling back to Serializer for types
+    orjson does not handle (e.g. Decimal)"""
+    try:
+        return orjson.dumps(data).decode()
+    except TypeError:
+        return Serializer.json_dumps(data)
+
+
+# updatedBy recorded on every function call write from this engine
+_UPDATED_BY = "mcp_daemon_engine"
+
 INSERT_UPDATE_MCP_FUNCTION_CALL = """mutation insertUpdateMcpFunctionCall(
     $arguments: JSONCamelCase,
     $contentInS3: Boolean,
@@ -120,25 +247,34 @@ MCP_FUNCTION_CALL = """query mcpFunctionCall($mcpFunctionCallUuid: String!) {
 }"""
 
 
+def _graphql_call(
+    partition_key: str, query: str, variables: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run a query against the in-process MCP core and parse its response once.
+
+    ``variables`` is handed to the core as is, so callers pass the dict they
+    built instead of unpacking it into keyword arguments.
+    """
+    response = Config.mcp_core.mcp_core_graphql(
+        context={"partition_key": partition_key},
+        query=query,
+        variables=variables,
+    )
+    return _json_loads(response.get("body", response))
+
+
 def _check_existing_function_call(
     partition_key: str,
     mcp_function_call_uuid: str,
 ) -> Dict[str, Any]:
-    response = Config.mcp_core.mcp_core_graphql(
-        **{
-            "context": {
-                "partition_key": partition_key,
-            },
-            "query": MCP_FUNCTION_CALL,
-            "variables": {
-                "mcpFunctionCallUuid": mcp_function_call_uuid,
-            },
-        }
+    response = _graphql_call(
+        partition_key,
+        MCP_FUNCTION_CALL,
+        {"mcpFunctionCallUuid": mcp_function_call_uuid},
     )
-    response = Serializer.json_loads(response.get("body", response))
 
     if "errors" in response:
-        Config.logger.error(f"GraphQL error: {response['errors']}")
+        Config.logger.error("GraphQL error: %s", response["errors"])
         raise Exception(response["errors"])
     elif "data" in response:
         response = response.get("data", {})
@@ -148,139 +284,393 @@ def _check_existing_function_call(
     return mcp_function_call
 
 
+# (variable, GraphQL type) pairs of insertUpdateMcpFunctionCall, used to
+# build aliased multi-mutation documents for batched writes
+_FUNCTION_CALL_MUTATION_VARIABLES = (
+    ("arguments", "JSONCamelCase"),
+    ("contentInS3", "Boolean"),
+    ("content", "String"),
+    ("mcpFunctionCallUuid", "String"),
+    ("mcpType", "String"),
+    ("name", "String"),
+    ("notes", "String"),
+    ("status", "String"),
+    ("timeSpent", "Int"),
+    ("updatedBy", "String!"),
+)
+
+
+_FUNCTION_CALL_SELECTION = """mcpFunctionCall {
+            partitionKey
+            mcpFunctionCallUuid
+            mcpType
+            name
+            arguments
+            content
+            status
+            notes
+            timeSpent
+            updatedBy
+            createdAt
+            updatedAt
+        }"""
+
+
+@functools.lru_cache(maxsize=None)
+def _function_call_batch_mutation(size: int) -> str:
+    """Aliased insertUpdateMcpFunctionCall document (m0..mN) for a batch"""
+    declarations = ",\n    ".join(
+        f"${variable}{index}: {graphql_type}"
+        for index in range(size)
+        for variable, graphql_type in _FUNCTION_CALL_MUTATION_VARIABLES
+    )
+    mutations = "\n".join(
+        f"    m{index}: insertUpdateMcpFunctionCall("
+        + ", ".join(
+            f"{variable}: ${variable}{index}"
+            for variable, _ in _FUNCTION_CALL_MUTATION_VARIABLES
+        )
+        + f") {{\n        {_FUNCTION_CALL_SELECTION}\n    }}"
+        for index in range(size)
+    )
+    return (
+        f"mutation batchInsertUpdateMcpFunctionCall(\n    {declarations}\n) {{\n"
+        f"{mutations}\n}}"
+    )
+
+
+def _execute_function_call_batch(
+    partition_key: str, batch: List[Dict[str, Any]]
+) -> List[Any]:
+    """
+    Run queued insertUpdateMcpFunctionCall writes for one partition as a
+    single GraphQL request and split the response back per write.
+    """
+    if len(batch) == 1:
+        query = INSERT_UPDATE_MCP_FUNCTION_CALL
+        variables = batch[0]
+        aliases = ["insertUpdateMcpFunctionCall"]
+    else:
+        query = _function_call_batch_mutation(len(batch))
+        variables = {
+            f"{variable}{index}": value
+            for index, item in enumerate(batch)
+            for variable, value in item.items()
+        }
+        aliases = [f"m{index}" for index in range(len(batch))]
+
+    response = _graphql_call(partition_key, query, variables)
+
+    errors = {}
+    for error in response.get("errors") or []:
+        path = error.get("path") or [None]
+        errors.setdefault(path[0], []).append(error)
+    if errors:
+        Config.logger.error("GraphQL error: %s", response["errors"])
+
+    data = response.get("data") or {}
+    results = []
+    for alias in aliases:
+        if data.get(alias) is None:
+            results.append(Exception(errors.get(alias) or response.get("errors")))
+        else:
+            results.append(data[alias]["mcpFunctionCall"])
+
+    return results
+
+
+# Coalesces concurrent function call writes into one GraphQL request per
+# partition (10ms window, up to 20 writes)
+_function_call_batcher = MicroBatcher(
+    _execute_function_call_batch,
+    interval=0.01,
+    max_batch_size=20,
+    name="mcp-function-call-writer",
+    max_pending=4096,
+)
+
+
+def _function_call_variables(**kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Mutation variables inserting a call, or updating the one named by
+    mcp_function_call_uuid"""
+    if kwargs.get("mcp_function_call_uuid"):
+        Config.logger.debug("Updating existing MCP function call")
+        variables = {
+            "mcpFunctionCallUuid": kwargs["mcp_function_call_uuid"],
+            "content": kwargs.get("content"),
+            "status": kwargs["status"],
+            "timeSpent": kwargs.get("time_spent", None),
+            "notes": kwargs.get("notes", None),
+            "updatedBy": _UPDATED_BY,
+        }
+    else:
+        Config.logger.debug("Making GraphQL call to insert/update MCP function")
+        variables = {
+            "name": kwargs["name"],
+            "mcpType": kwargs["mcp_type"],
+            "arguments": Serializer.json_normalize(
+                kwargs["arguments"], parser_number=False
+            ),
+            "updatedBy": _UPDATED_BY,
+        }
+        # A call recorded only once it has finished carries its outcome too
+        for key, variable in (
+            ("status", "status"),
+            ("content", "content"),
+            ("time_spent", "timeSpent"),
+            ("notes", "notes"),
+        ):
+            if key in kwargs:
+                variables[variable] = kwargs[key]
+
+    return variables
+
+
 def _insert_update_mcp_function_call(
-    partition_key: str, **kwargs: Dict[str, Any]
-) -> Dict[str, Any]:
+    partition_key: str, _wait: bool = True, **kwargs: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
     """
     Private helper function to insert/update MCP function call record
+
+    With ``_wait=False`` the write is left to the writer thread and None is
+    returned; when the writer is backed up the caller blocks until it can
+    queue the write, so no record is ever dropped.
     """
-    if kwargs.get("mcp_function_call_uuid"):
-        Config.logger.info("Updating existing MCP function call")
+    variables = _function_call_variables(**kwargs)
+    if _wait:
+        return _function_call_batcher.submit(partition_key, variables).result()
 
-        response = Config.mcp_core.mcp_core_graphql(
-            **{
-                "context": {
-                    "partition_key": partition_key,
-                },
-                "query": INSERT_UPDATE_MCP_FUNCTION_CALL,
-                "variables": {
-                    "mcpFunctionCallUuid": kwargs["mcp_function_call_uuid"],
-                    "content": kwargs.get("content"),
-                    "status": kwargs["status"],
-                    "timeSpent": kwargs.get("time_spent", None),
-                    "notes": kwargs.get("notes", None),
-                    "updatedBy": "mcp_daemon_engine",
-                },
-            }
+    future = _function_call_batcher.submit(partition_key, variables)
+
+    # Tracked so wait_for_background_threads flushes it on shutdown
+    _track_future(future)
+    future.add_done_callback(_log_write_failure)
+    return None
+
+
+def mark_function_call_failed(
+    partition_key: str, mcp_function_call_uuid: str, notes: str
+) -> None:
+    """Record a call its worker could not finish as failed and announce it"""
+    mcp_function_call = _insert_update_mcp_function_call(
+        partition_key,
+        mcp_function_call_uuid=mcp_function_call_uuid,
+        status="failed",
+        notes=notes,
+    )
+    _publish_tool_completion(mcp_function_call)
+
+
+async def _insert_update_mcp_function_call_async(
+    partition_key: str, **kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Insert/update a function call record from the event loop.
+
+    The write joins the writer's next batch and is awaited without holding
+    a worker thread; only a backed-up writer is waited on in a thread.
+    """
+    variables = _function_call_variables(**kwargs)
+    try:
+        future = _function_call_batcher.submit(partition_key, variables, block=False)
+    except queue.Full:
+        future = await asyncio.to_thread(
+            _function_call_batcher.submit, partition_key, variables
         )
-    else:
-        Config.logger.info("Making GraphQL call to insert/update MCP function")
-        response = Config.mcp_core.mcp_core_graphql(
-            **{
-                "context": {
-                    "partition_key": partition_key,
-                },
-                "query": INSERT_UPDATE_MCP_FUNCTION_CALL,
-                "variables": {
-                    "name": kwargs["name"],
-                    "mcpType": kwargs["mcp_type"],
-                    "arguments": Serializer.json_normalize(
-                        kwargs["arguments"], parser_number=False
-                    ),
-                    "updatedBy": "mcp_daemon_engine",
-                },
-            }
+    return await asyncio.wrap_future(future)
+
+
+def _log_write_failure(future: concurrent.futures.Future) -> None:
+    if future.exception() is not None:
+        Config.logger.warning(
+            "Failed to record MCP function call: %s", future.exception()
         )
 
-    response = Serializer.json_loads(response.get("body", response))
 
-    if "errors" in response:
-        Config.logger.error(f"GraphQL error: {response['errors']}")
-        raise Exception(response["errors"])
-    elif "data" in response:
-        response = response.get("data", {})
+def _wait_for_call_writes() -> bool:
+    """Whether synchronous calls wait for their record to be written.
 
-    mcp_function_call = response["insertUpdateMcpFunctionCall"]["mcpFunctionCall"]
+    Always true on Lambda, which may freeze the process right after the
+    response, and when Config.sync_call_writes is set for debugging.
+    """
+    return Config.sync_call_writes or "AWS_LAMBDA_FUNCTION_NAME" in os.environ
 
-    return mcp_function_call
+
+def _publish_tool_completion(mcp_function_call: Dict[str, Any]) -> None:
+    """
+    Notify dispatchers that an async tool call reached a terminal status.
+
+    Only publishes when a completion topic is configured. Content that would
+    exceed the SNS message limit is left out; the dispatcher reads it from
+    storage instead.
+    """
+    if Config.aws_sns is None:
+        return
+
+    message = {
+        "partitionKey": mcp_function_call["partitionKey"],
+        "mcpFunctionCallUuid": mcp_function_call["mcpFunctionCallUuid"],
+        "status": mcp_function_call["status"],
+        "content": mcp_function_call.get("content"),
+        "notes": mcp_function_call.get("notes"),
+    }
+    body = _json_dumps(message)
+    if len(body.encode("utf-8")) > SNS_MESSAGE_LIMIT:
+        message.pop("content")
+        message.pop("notes")
+        body = _json_dumps(message)
+
+    try:
+        Config.aws_sns.publish(
+            TopicArn=Config.tool_completion_topic_arn,
+            Message=body,
+            MessageAttributes={
+                "mcpFunctionCallUuid": {
+                    "DataType": "String",
+                    "StringValue": message["mcpFunctionCallUuid"],
+                }
+            },
+        )
+    except Exception as e:
+        # Dispatchers fall back to reading the call record on timeout
+        Config.logger.warning("Failed to publish tool completion: %s", e)
+
+
+_RESULT_ITEM_TYPES = (EmbeddedResource, TextContent, ImageContent)
+
+# Shared adapter so a result list is dumped in one pass instead of one
+# model_dump() per item
+_RESULT_ADAPTER = TypeAdapter(List[Union[EmbeddedResource, TextContent, ImageContent]])
+
+
+def _stored_content(content: Any) -> str:
+    """Content recorded on the function call: the text of a single text
+    item, otherwise the JSON of the whole result"""
+    if isinstance(content, str):
+        return content
+    if (
+        isinstance(content, list)
+        and len(content) == 1
+        and isinstance(content[0], dict)
+        and content[0].get("type") == "text"
+    ):
+        return content[0]["text"]
+    return _json_dumps(content)
+
+
+def _call_identity(
+    mcp_function_call: Optional[Dict[str, Any]], new_call: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Write arguments naming an existing call record, or the fields of a
+    call to insert"""
+    if mcp_function_call is not None:
+        return {"mcp_function_call_uuid": mcp_function_call["mcpFunctionCallUuid"]}
+    return new_call
 
 
 def execute_decorator():
     def actual_decorator(original_function):
+        # Constant per decorated executor: "tool", "resource" or "prompt"
+        mcp_type = original_function.__name__.removeprefix("execute_").removesuffix(
+            "_function"
+        )
+        function_name = original_function.__name__
+
         @functools.wraps(original_function)
         def wrapper_function(*args, **kwargs):
             try:
-                Config.logger.info("Starting execution of MCP function")
                 mcp_function_call = None
-                start_time = pendulum.now("UTC")
+                # Fields of a synchronous call; it is recorded in one write
+                # once its outcome is known
+                new_call = None
+                start_ns = time.perf_counter_ns()
                 partition_key = args[0]
 
+                # The dispatcher may hand over the record it just inserted,
+                # which saves reading it back
+                prefetched = kwargs.pop("_mcp_function_call_prefetched", None)
+
                 if kwargs.get("mcp_function_call_uuid"):
-                    mcp_function_call = _check_existing_function_call(
-                        partition_key, kwargs["mcp_function_call_uuid"]
-                    )
+                    if (
+                        prefetched
+                        and prefetched.get("mcpFunctionCallUuid")
+                        == kwargs["mcp_function_call_uuid"]
+                    ):
+                        mcp_function_call = prefetched
+                    else:
+                        mcp_function_call = _check_existing_function_call(
+                            partition_key, kwargs["mcp_function_call_uuid"]
+                        )
+
+                    # Mark the call as picked up by the worker before running it
+                    if mcp_function_call["status"] == "initial":
+                        mcp_function_call = _insert_update_mcp_function_call(
+                            partition_key,
+                            **{
+                                "mcp_function_call_uuid": mcp_function_call[
+                                    "mcpFunctionCallUuid"
+                                ],
+                                "status": "in_process",
+                            },
+                        )
 
-                if partition_key != "default" and mcp_function_call is None:
-                    Config.logger.info(f"Processing partition_key: {partition_key}")
-                    mcp_type = original_function.__name__.replace(
-                        "execute_", ""
-                    ).replace("_function", "")
-                    Config.logger.info(f"MCP type determined: {mcp_type}")
+                # One configuration snapshot serves the decorator and the
+                # executor, so both see the same entries. It is fetched once
+                # the call record is resolved, so a failed fetch marks the
+                # record failed below instead of leaving it in_process
+                dispatch = kwargs["_mcp_dispatch"] = get_mcp_dispatch_with_retry(
+                    partition_key
+                )
 
+                # Synchronous calls are only recorded with tracking enabled;
+                # async calls always are, their dispatcher reads the record
+                if (
+                    Config.tracking_enabled
+                    and partition_key != "default"
+                    and mcp_function_call is None
+                ):
                     if mcp_type == "resource":
-                        Config.logger.info("Processing resource type MCP")
-                        resource = next(
-                            (
-                                resource
-                                for resource in Config.fetch_mcp_configuration(
-                                    partition_key
-                                )["resources"]
-                                if resource["uri"] == args[1]
-                            ),
-                            None,
-                        )
+                        resource = dispatch["resources"].get(args[1])
 
                         if resource is None:
-                            raise Exception(f"Resource not found for URI: {args[1]}")
+                            raise KeyError(f"Unknown resource URI: {args[1]}")
 
                         name = resource["name"]
                         arguments = {"uri": args[1]}
-                        Config.logger.info(
-                            f"Resource name: {name}, arguments: {arguments}"
-                        )
                     else:
                         name = args[1]
                         arguments = args[2]
-                        Config.logger.info(
-                            f"Function name: {name}, arguments: {arguments}"
-                        )
 
-                    mcp_function_call = _insert_update_mcp_function_call(
+                    new_call = {
+                        "name": name,
+                        "mcp_type": mcp_type,
+                        "arguments": arguments,
+                    }
+
+                if Config.logger.isEnabledFor(logging.DEBUG):
+                    Config.logger.debug(
+                        "Executing %s(%s) for %s with %s",
+                        function_name,
+                        args[1],
                         partition_key,
-                        **{"name": name, "mcp_type": mcp_type, "arguments": arguments},
+                        args[2:],
                     )
-
-                Config.logger.info("Executing original function")
                 result = original_function(*args, **kwargs)
 
                 content = None
                 if isinstance(result, list):
-                    content = []
-                    for item in result:
-                        if isinstance(item, EmbeddedResource):
-                            content.append(
-                                item.model_dump(mode="json", exclude_none=True)
-                            )
-                        elif isinstance(item, TextContent):
-                            content.append(
-                                item.model_dump(mode="json", exclude_none=True)
-                            )
-                        elif isinstance(item, ImageContent):
-                            content.append(
+                    if all(isinstance(item, _RESULT_ITEM_TYPES) for item in result):
+                        content = _RESULT_ADAPTER.dump_python(
+                            result, mode="json", exclude_none=True
+                        )
+                    else:
+                        content = [
+                            (
                                 item.model_dump(mode="json", exclude_none=True)
+                                if isinstance(item, _RESULT_ITEM_TYPES)
+                                else item
                             )
-                        else:
-                            content.append(item)
+                            for item in result
+                        ]
                 elif isinstance(result, (ReadResourceResult, GetPromptResult)):
                     # Handle MCP structured result types
                     content = result.model_dump(mode="json", exclude_none=True)
@@ -288,45 +678,47 @@ def execute_decorator():
                     # Handle other types (strings, dicts, etc.)
                     content = result
 
-                if mcp_function_call is not None:
-                    time_spent = int(
-                        pendulum.now("UTC").diff(start_time).in_seconds() * 1000
-                    )
-                    Config.logger.info(f"Function execution time: {time_spent}ms")
-
-                    Config.logger.info("Updating MCP function call with results")
-                    _insert_update_mcp_function_call(
+                time_spent = (time.perf_counter_ns() - start_ns) // 1_000_000
+                if mcp_function_call is not None or new_call is not None:
+                    mcp_function_call = _insert_update_mcp_function_call(
                         partition_key,
+                        # Nobody waits on a synchronous call's record
+                        _wait=new_call is None or _wait_for_call_writes(),
+                        **_call_identity(mcp_function_call, new_call),
                         **{
-                            "mcp_function_call_uuid": mcp_function_call[
-                                "mcpFunctionCallUuid"
-                            ],
-                            "content": content[0]["text"],
+                            "content": _stored_content(content),
                             "status": "completed",
                             "time_spent": time_spent,
-                            "updatedBy": "mcp_daemon_engine",
                         },
                     )
 
-                Config.logger.info("Successfully completed MCP function execution")
+                    if kwargs.get("mcp_function_call_uuid"):
+                        _publish_tool_completion(mcp_function_call)
+
+                # One record per call instead of a log line per step
+                Config.logger.info(
+                    "%s %s completed in %dms (partition_key=%s, recorded=%s)",
+                    function_name,
+                    args[1],
+                    time_spent,
+                    partition_key,
+                    mcp_function_call is not None or new_call is not None,
+                )
                 return result
 
             except Exception as e:
                 log = traceback.format_exc()
-                Config.logger.error(f"Error in MCP function execution: {log}")
-                if mcp_function_call is not None:
-                    Config.logger.info("Updating MCP function call with error status")
-                    _insert_update_mcp_function_call(
-                        mcp_function_call["partitionKey"],
-                        **{
-                            "mcp_function_call_uuid": mcp_function_call[
-                                "mcpFunctionCallUuid"
-                            ],
-                            "notes": log,
-                            "status": "failed",
-                            "updatedBy": "mcp_daemon_engine",
-                        },
+                Config.logger.error("Error in MCP function execution: %s", log)
+                if mcp_function_call is not None or new_call is not None:
+                    mcp_function_call = _insert_update_mcp_function_call(
+                        partition_key,
+                        _wait=new_call is None or _wait_for_call_writes(),
+                        **_call_identity(mcp_function_call, new_call),
+                        **{"notes": log, "status": "failed"},
                     )
+
+                    if kwargs.get("mcp_function_call_uuid"):
+                        _publish_tool_completion(mcp_function_call)
                 raise e
 
         return wrapper_function
@@ -334,295 +726,660 @@ def execute_decorator():
     return actual_decorator
 
 
-def get_mcp_configuration_with_retry(
+def _fetch_with_retry(
+    fetch: Callable[..., Dict[str, Any]],
     partition_key: str,
-    max_retries: int = 1,
-) -> Dict[str, Any] | Any:
-    """
-    Get MCP configuration with automatic retry on failure.
-
-    Args:
-        partition_key: Endpoint ID to fetch configuration for
-        max_retries: Maximum number of retry attempts with cache refresh
-
-    Returns:
-        MCP configuration dictionary
-
-    Raises:
-        Exception: If configuration cannot be retrieved after retries
-    """
+    max_retries: int,
+) -> Dict[str, Any]:
     for attempt in range(max_retries + 1):
         try:
             force_refresh = attempt > 0  # Force refresh on retry attempts
 
-            return Config.fetch_mcp_configuration(
-                partition_key, force_refresh=force_refresh
-            )
+            return fetch(partition_key, force_refresh=force_refresh)
         except Exception as e:
             if attempt < max_retries:
                 Config.logger.warning(
-                    f"Failed to fetch MCP config for {partition_key} (attempt {attempt + 1}), "
-                    f"retrying with cache refresh: {e}"
+                    "Failed to fetch MCP config for %s (attempt %d), "
+                    "retrying with cache refresh: %s",
+                    partition_key,
+                    attempt + 1,
+                    e,
                 )
                 # Clear cache before retry
                 Config.clear_mcp_configuration_cache(partition_key)
                 continue
             else:
                 Config.logger.error(
-                    f"Failed to fetch MCP config for {partition_key} after {max_retries + 1} attempts: {e}"
+                    "Failed to fetch MCP config for %s after %d attempts: %s",
+                    partition_key,
+                    max_retries + 1,
+                    e,
                 )
                 raise
 
 
-def _module_exists(module_name: str) -> bool:
-    """Check if the module exists in the specified path."""
-    module_dir = os.path.join(Config.funct_extract_path, module_name)
-    if os.path.exists(module_dir) and os.path.isdir(module_dir):
-        Config.logger.info(
-            f"Module {module_name} found in {Config.funct_extract_path}."
-        )
-        return True
-    Config.logger.info(
-        f"Module {module_name} not found in {Config.funct_extract_path}."
-    )
-    return False
+def get_mcp_configuration_with_retry(
+    partition_key: str,
+    max_retries: int = 1,
+) -> Dict[str, Any] | Any:
+    """
+    Get MCP configuration with automatic retry on failure.
 
+    Args:
+        partition_key: Endpoint ID to fetch configuration for
+        max_retries: Maximum number of retry attempts with cache refresh
 
-def _download_and_extract_package(package_name: str) -> None:
-    """Download and extract the module from S3 if not already extracted."""
-    key = f"{package_name}.zip"
-    zip_path = f"{Config.funct_zip_path}/{key}"
+    Returns:
+        MCP configuration dictionary
 
-    Config.logger.info(
-        f"Downloading module from S3: bucket={Config.funct_bucket_name}, key={key}"
-    )
-    Config.aws_s3.download_file(Config.funct_bucket_name, key, zip_path)
-    Config.logger.info(f"Downloaded {key} from S3 to {zip_path}")
+    Raises:
+        Exception: If configuration cannot be retrieved after retries
+    """
+    return _fetch_with_retry(Config.fetch_mcp_configuration, partition_key, max_retries)
 
-    # Extract the ZIP file
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        zip_ref.extractall(Config.funct_extract_path)
-    Config.logger.info(f"Extracted module to {Config.funct_extract_path}")
 
+def get_mcp_dispatch_with_retry(
+    partition_key: str,
+    max_retries: int = 1,
+) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+    """
+    Get the dispatch indexes of the MCP configuration (see
+    Config.fetch_mcp_dispatch) with automatic retry on failure.
+    """
+    return _fetch_with_retry(Config.fetch_mcp_dispatch, partition_key, max_retries)
 
-def _get_module(package_name: str, module_name: str, source: str = None) -> type:
-    try:
-        """Get the module class from the package."""
-        if source is None:
-            return getattr(__import__(module_name), module_name)
 
-        # Check if the module exists
-        if not _module_exists(module_name):
-            # Download and extract the module if it doesn't exist
-            _download_and_extract_package(package_name)
+# Resolved classes keyed by (package_name, module_name, class_name, source)
+_CLASS_CACHE: Dict[tuple, type] = {}
+_CLASS_CACHE_LOCK = threading.RLock()
+# Packages whose extracted version has been checked by this process
+_extracted_packages = set()
+# Extracted version directory of each package loaded by this process
+_package_roots: Dict[str, str] = {}
 
-        # Add the extracted module to sys.path
-        module_path = f"{Config.funct_extract_path}"
-        if module_path not in sys.path:
-            sys.path.append(module_path)
 
-        # Import the module and get the class
-        module = __import__(module_name)
-        return module
-    except Exception as e:
-        log = traceback.format_exc()
-        Config.logger.error(log)
-        raise e
+class _FunctionPackageFinder(importlib.abc.MetaPathFinder):
+    """
+    Resolves top-level imports from the extracted function packages.
+
+    Installed at the end of sys.meta_path instead of adding the package
+    directories to sys.path, so installed modules still win and lookups
+    of function modules only search those directories rather than every
+    sys.path entry. The search itself is delegated to PathFinder, so packages,
+    namespace packages and every loader suffix (source, bytecode-only and
+    extension modules) resolve exactly as they would from sys.path.
+    Submodules are found through the package's __path__ as usual.
+    """
 
+    def __init__(self, roots: Dict[str, str]):
+        self.roots = roots
 
-def _get_class(
-    package_name: str, module_name: str, class_name: str, source: str = None
-) -> Optional[type]:
-    try:
-        # Import the module and get the class
-        module = _get_module(package_name, module_name, source=source)
-        return getattr(module, class_name)
-    except Exception as e:
-        log = traceback.format_exc()
-        Config.logger.error(log)
-        raise e
+    def find_spec(self, fullname, path=None, target=None):
+        if path is not None or "." in fullname:
+            return None
+        return importlib.machinery.PathFinder.find_spec(
+            fullname, list(self.roots.values()), target
+        )
 
 
-def _validate_nested_structure(
-    schema: Dict[str, Any], data: Dict[str, Any], field_path: str = ""
-) -> None:
-    """
-    Private function to recursively validate required fields in nested objects and arrays.
+_function_finder: Optional[_FunctionPackageFinder] = None
 
-    Args:
-        schema: JSONCamelCase schema definition for the data structure
-        data: The actual data to validate
-        field_path: Current field path for error reporting
-    """
-    import copy
 
-    if schema.get("type") == "object" and "properties" in schema:
-        # Handle object validation
-        nested_required = schema.get("required", [])
-        nested_properties = schema["properties"]
+def _install_function_finder() -> None:
+    global _function_finder
 
-        for nested_key, nested_schema in nested_properties.items():
-            nested_path = f"{field_path}.{nested_key}" if field_path else nested_key
+    if _function_finder is not None:
+        return
 
-            if nested_key not in data:
-                if "default" in nested_schema:
-                    default_value = nested_schema["default"]
-                    if isinstance(default_value, (dict, list)):
-                        data[nested_key] = copy.deepcopy(default_value)
-                    else:
-                        data[nested_key] = default_value
-                elif nested_key in nested_required:
-                    raise Exception(f"Missing required argument: {nested_path}")
+    with _CLASS_CACHE_LOCK:
+        if _function_finder is None:
+            _function_finder = _FunctionPackageFinder(_package_roots)
+            sys.meta_path.append(_function_finder)
+
+
+def _prewarm_in_parallel(
+    label: str, function: Callable[..., Any], calls: Dict[Any, tuple]
+) -> Dict[Any, Any]:
+    """Run function(*args) for each entry of calls on up to 16 threads,
+    logging failures, and return the successful results by key"""
+    results = {}
+    if not calls:
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(16, len(calls)),
+        thread_name_prefix="mcp-prewarm",
+    ) as executor:
+        futures = {executor.submit(function, *args): key for key, args in calls.items()}
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception() is not None:
+                Config.logger.warning(
+                    "Failed to prewarm %s %s: %s",
+                    label,
+                    futures[future],
+                    future.exception(),
+                )
             else:
-                # Recursively validate nested structures
-                _validate_nested_structure(nested_schema, data[nested_key], nested_path)
+                results[futures[future]] = future.result()
+    return results
+
+
+def prewarm_configurations(partition_keys: Sequence[str]) -> None:
+    """
+    Fetch the MCP configurations of several partitions in parallel, then
+    download the function packages they reference in parallel.
+
+    Failures are logged and left for the first dispatch to retry.
+    """
+    dispatches = _prewarm_in_parallel(
+        "MCP config",
+        get_mcp_dispatch_with_retry,
+        {key: (key,) for key in partition_keys if key},
+    )
+
+    if not Config.funct_bucket_name:
+        return
+
+    packages = {}
+    for dispatch in dispatches.values():
+        for module in dispatch["modules"].values():
+            if module.get("source") is not None:
+                packages.setdefault(
+                    module["package_name"],
+                    (module["package_name"], module["module_name"]),
+                )
+    _prewarm_in_parallel("package", _ensure_package, packages)
+
+
+# Background prewarms run apart from the tool pool so they never take
+# worker slots from tool calls
+_prewarm_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="mcp-prewarm-background"
+)
+
+
+def _prewarm_in_background(partition_key: str) -> None:
+    """Start fetching a partition's configuration the first time it is seen."""
+    if Config.claim_prewarm(partition_key):
+        _prewarm_pool.submit(prewarm_configurations, [partition_key])
+
+
+_config_refresher: Optional[threading.Thread] = None
+
+
+def start_configuration_refresher() -> None:
+    """
+    Re-fetch the configurations of Config.prewarm_partition_keys every
+    Config.config_refresh_seconds in a daemon thread.
+
+    Readers keep using the cached configuration until the refreshed one
+    replaces it.
+    """
+    global _config_refresher
+
+    if Config.config_refresh_seconds <= 0 or not Config.prewarm_partition_keys:
+        return
+
+    def _refresh() -> None:
+        while True:
+            time.sleep(Config.config_refresh_seconds)
+            for partition_key in Config.prewarm_partition_keys:
+                try:
+                    Config.fetch_mcp_dispatch(partition_key, force_refresh=True)
+                except Exception as e:
+                    Config.logger.warning(
+                        "Failed to refresh MCP config for %s: %s", partition_key, e
+                    )
+
+    with _tool_pool_lock:
+        if _config_refresher is None or not _config_refresher.is_alive():
+            _config_refresher = threading.Thread(
+                target=_refresh, name="mcp-config-refresher", daemon=True
+            )
+            _config_refresher.start()
+
+
+# Package names are S3 key stems and directory names under the extract path
+_PACKAGE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+def _check_names(package_name: Optional[str], module_name: Optional[str]) -> None:
+    """Reject package and module names that could address other paths"""
+    if package_name is not None and (
+        not isinstance(package_name, str)
+        or _PACKAGE_NAME.fullmatch(package_name) is None
+        or ".." in package_name
+    ):
+        raise ValueError(f"Invalid package name: {package_name!r}")
+    if module_name is not None and (
+        not isinstance(module_name, str) or not module_name.isidentifier()
+    ):
+        raise ValueError(f"Invalid module name: {module_name!r}")
+
+
+def _package_dir(package_name: str) -> str:
+    """Directory holding the extracted versions of a package"""
+    root = os.path.realpath(Config.funct_extract_path)
+    path = os.path.realpath(os.path.join(root, ".packages", package_name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Invalid package name: {package_name!r}")
+    return path
+
+
+def _version_name(etag: Optional[str]) -> str:
+    """Directory name of the package version with the given ETag"""
+    if etag is None:
+        return f"unversioned-{uuid.uuid4().hex}"
+    return hashlib.sha256(etag.encode("utf-8")).hexdigest()[:32]
+
+
+def _current_version(package_dir: str) -> Optional[str]:
+    """Version directory the package's ``current`` link points at, if any"""
+    current = os.path.join(package_dir, "current")
+    if not os.path.islink(current):
+        return None
+    version_dir = os.path.realpath(current)
+    return version_dir if os.path.isdir(version_dir) else None
+
+
+def _activate_version(package_dir: str, version_dir: str) -> None:
+    """
+    Point the package's ``current`` link at version_dir atomically, then
+    drop all versions except the new one and the one it replaced.
 
-    elif schema.get("type") == "array" and "items" in schema:
-        # Handle array validation
-        items_schema = schema["items"]
-        if isinstance(data, list):
+    The replaced version is kept because modules already imported from
+    it may still load submodules or data files from there.
+    """
+    previous = _current_version(package_dir)
+    link = os.path.join(package_dir, f".current-{os.getpid()}")
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(version_dir), link)
+    os.replace(link, os.path.join(package_dir, "current"))
+
+    keep = {os.path.basename(version_dir), "current"}
+    if previous is not None:
+        keep.add(os.path.basename(previous))
+    for entry in os.listdir(package_dir):
+        if entry in keep or entry.startswith("."):
+            continue
+        shutil.rmtree(os.path.join(package_dir, entry), ignore_errors=True)
+
+
+# Archives up to this size are extracted from memory; larger ones spill to a
+# temporary file while downloading
+_ZIP_IN_MEMORY_LIMIT = 32 * 1024 * 1024
+# Members read ahead of the writer threads during extraction
+_EXTRACT_WINDOW = 64
+# Copy buffer for downloads and for members too large to read in one go
+_COPY_BUFFER = 1024 * 1024
+
+
+def _member_path(extract_path: str, member: zipfile.ZipInfo) -> str:
+    """Target path of a member, refusing names that escape extract_path"""
+    root = os.path.realpath(extract_path)
+    path = os.path.realpath(os.path.join(root, member.filename))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Unsafe path in package archive: {member.filename}")
+    return path
+
+
+def _write_member(path: str, data: bytes) -> None:
+    with open(path, "wb") as target:
+        target.write(data)
+
+
+def _extract_members(zip_ref: zipfile.ZipFile, extract_path: str) -> None:
+    """
+    Extract an archive with parallel file writes.
+
+    ZipFile reads are not thread-safe, so members are read on this thread
+    in windows of _EXTRACT_WINDOW and only the writes are spread over a
+    small pool. Members larger than _COPY_BUFFER are streamed to disk on
+    this thread instead of being held in memory.
+    """
+    members = zip_ref.infolist()
+    for member in members:
+        path = _member_path(extract_path, member)
+        os.makedirs(
+            path if member.is_dir() else os.path.dirname(path), exist_ok=True
+        )
+
+    files = []
+    for member in members:
+        if member.is_dir():
+            continue
+        if member.file_size <= _COPY_BUFFER:
+            files.append(member)
+            continue
+        with zip_ref.open(member) as source, open(
+            _member_path(extract_path, member), "wb", buffering=_COPY_BUFFER
+        ) as target:
+            shutil.copyfileobj(source, target, _COPY_BUFFER)
+
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=8, thread_name_prefix="mcp-extract"
+    ) as executor:
+        for start in range(0, len(files), _EXTRACT_WINDOW):
+            writes = [
+                executor.submit(
+                    _write_member,
+                    _member_path(extract_path, member),
+                    zip_ref.read(member),
+                )
+                for member in files[start : start + _EXTRACT_WINDOW]
+            ]
+            for write in writes:
+                write.result()
+
+
+def _download_and_extract_package(package_name: str, extract_path: str) -> None:
+    """Download the package archive from S3 and extract it into extract_path."""
+    key = f"{package_name}.zip"
+
+    Config.logger.info(
+        "Downloading module from S3: bucket=%s, key=%s",
+        Config.funct_bucket_name,
+        key,
+    )
+    with tempfile.SpooledTemporaryFile(max_size=_ZIP_IN_MEMORY_LIMIT) as body:
+        # download_fileobj fetches large archives in parallel ranged parts
+        Config.aws_s3.download_fileobj(Config.funct_bucket_name, key, body)
+        body.seek(0)
+        Config.logger.info("Downloaded %s from S3", key)
+
+        with zipfile.ZipFile(body, "r") as zip_ref:
+            _extract_members(zip_ref, extract_path)
+    Config.logger.info("Extracted module to %s", extract_path)
+
+
+def _package_etag(package_name: str) -> Optional[str]:
+    """ETag of the package archive in S3, or None when it cannot be read"""
+    try:
+        return Config.aws_s3.head_object(
+            Bucket=Config.funct_bucket_name, Key=f"{package_name}.zip"
+        )["ETag"]
+    except Exception as e:
+        Config.logger.warning("Failed to read ETag of %s: %s", package_name, e)
+        return None
+
+
+def _ensure_package(package_name: str, module_name: str) -> None:
+    """
+    Make sure the current package providing module_name is extracted, once
+    per process.
+
+    Each archive version is extracted into its own directory under
+    ``.packages/<package_name>/``, named after its ETag, and the
+    package's ``current`` link is then swapped to it atomically. A
+    redeploy therefore never rewrites files that running tools may still
+    be loading. Extraction is serialized by an flock on a per-package
+    lock file, so concurrent threads and processes sharing the extract
+    path download a package only once. If the ETag cannot be read, an
+    existing version is kept as is.
+    """
+    if package_name in _extracted_packages:
+        return
+
+    _check_names(package_name, module_name)
+    package_dir = _package_dir(package_name)
+    os.makedirs(package_dir, exist_ok=True)
+    with open(os.path.join(package_dir, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            etag = _package_etag(package_name)
+            version_dir = _current_version(package_dir)
+            if version_dir is None or (
+                etag is not None
+                and os.path.basename(version_dir) != _version_name(etag)
+            ):
+                version_dir = os.path.join(package_dir, _version_name(etag))
+                if not os.path.isdir(version_dir):
+                    staging = tempfile.mkdtemp(prefix=".extract-", dir=package_dir)
+                    try:
+                        _download_and_extract_package(package_name, staging)
+                        os.rename(staging, version_dir)
+                    except BaseException:
+                        shutil.rmtree(staging, ignore_errors=True)
+                        raise
+                _activate_version(package_dir, version_dir)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    with _CLASS_CACHE_LOCK:
+        _package_roots[package_name] = version_dir
+        _extracted_packages.add(package_name)
+    importlib.invalidate_caches()
+
+
+def _get_module(package_name: str, module_name: str, source: str = None) -> type:
+    try:
+        """Get the module class from the package."""
+        if source is None:
+            return getattr(__import__(module_name), module_name)
+
+        # Download and extract the module if it doesn't exist
+        _ensure_package(package_name, module_name)
+
+        # Import the module through the finder for the extract path
+        _install_function_finder()
+        return importlib.import_module(module_name)
+    except Exception as e:
+        log = traceback.format_exc()
+        Config.logger.error(log)
+        raise e
+
+
+def _get_class(
+    package_name: str, module_name: str, class_name: str, source: str = None
+) -> Optional[type]:
+    key = (package_name, module_name, class_name, source)
+    cls = _CLASS_CACHE.get(key)
+    if cls is not None:
+        return cls
+
+    try:
+        with _CLASS_CACHE_LOCK:
+            cls = _CLASS_CACHE.get(key)
+            if cls is None:
+                # Import the module and get the class
+                module = _get_module(package_name, module_name, source=source)
+                cls = _CLASS_CACHE[key] = getattr(module, class_name)
+        return cls
+    except Exception as e:
+        log = traceback.format_exc()
+        Config.logger.error(log)
+        raise e
+
+
+def clear_function_cache(package_name: str = None, module_name: str = None) -> None:
+    """
+    Forget resolved function classes of redeployed packages so the next
+    dispatch loads them again.
+
+    Checks package_name (every package loaded by this process when
+    omitted) against the ETag of its archive in S3. Only packages whose
+    ETag changed are invalidated: their cached classes and modules are
+    dropped so the next dispatch extracts the new version next to the old
+    one and imports from it. Extracted files are never deleted here, so
+    tools still running from the previous version are unaffected.
+    """
+    _check_names(package_name, module_name)
+
+    # Packages not loaded here need nothing: their first dispatch checks
+    # the ETag anyway. The S3 reads happen outside the lock.
+    loaded_versions = {
+        name: version_dir
+        for name, version_dir in list(_package_roots.items())
+        if package_name is None or name == package_name
+    }
+    stale = set()
+    for name, version_dir in loaded_versions.items():
+        etag = _package_etag(name)
+        if etag is not None and os.path.basename(version_dir) != _version_name(etag):
+            stale.add(name)
+
+    if not stale:
+        return
+
+    with _CLASS_CACHE_LOCK:
+        for name in stale:
+            _extracted_packages.discard(name)
+            _package_roots.pop(name, None)
+
+        module_names = set()
+        if module_name and package_name in stale:
+            module_names.add(module_name)
+        for key in list(_CLASS_CACHE):
+            if key[0] in stale:
+                module_names.add(key[1])
+                del _CLASS_CACHE[key]
+
+        for name in module_names:
+            for loaded in [
+                loaded
+                for loaded in sys.modules
+                if loaded == name or loaded.startswith(f"{name}.")
+            ]:
+                sys.modules.pop(loaded, None)
+
+
+def _module_setting(
+    index: Dict[str, Dict[Any, Any]], module_key: tuple
+) -> Dict[str, Any]:
+    """
+    Normalized module setting, snapshotted once per cached configuration.
+
+    The snapshot lives in the dispatch index and goes with it; each instance
+    gets its own copy, so nothing it changes leaks into the cache.
+    """
+    snapshot = index["module_settings"].get(module_key)
+    return thaw_value(snapshot) if snapshot is not None else {}
+
+
+def _validate_nested_structure(
+    plan: Any, data: Dict[str, Any], field_path: str = ""
+) -> None:
+    """
+    Private function to validate required fields in nested objects and arrays.
+
+    Walks the defaults template of the schema with an explicit worklist
+    instead of recursing, setting defaults for missing fields along the way.
+
+    Args:
+        plan: Defaults template built from the schema by the dispatch index
+        data: The actual data to validate
+        field_path: Current field path for error reporting
+    """
+    worklist = collections.deque([(plan, data, field_path)])
+
+    while worklist:
+        plan, data, field_path = worklist.pop()
+        children = []
+
+        if plan[0] == "object":
+            # Handle object validation
+            for nested_key, required, default, nested_plan in plan[1]:
+                nested_path = f"{field_path}.{nested_key}" if field_path else nested_key
+
+                if nested_key not in data:
+                    if default is not None:
+                        data[nested_key] = thaw_value(default)
+                    elif required:
+                        raise Exception(f"Missing required argument: {nested_path}")
+                elif nested_plan is not None:
+                    children.append((nested_plan, data[nested_key], nested_path))
+
+        elif isinstance(data, list) and plan[1] is not None:
+            # Handle array validation
             for i, item in enumerate(data):
                 item_path = f"{field_path}[{i}]" if field_path else f"[{i}]"
-                _validate_nested_structure(items_schema, item, item_path)
+                children.append((plan[1], item, item_path))
 
+        # Depth-first, in declaration order
+        worklist.extend(reversed(children))
 
-def _validate_and_set_defaults(
-    tool_schema: Dict[str, Any], arguments: Dict[str, Any]
-) -> None:
+
+def _validate_and_set_defaults(plan: Any, arguments: Dict[str, Any]) -> None:
     """
     Private function to validate arguments and set default values based on tool schema.
     Handles nested objects and arrays with required field validation.
     """
-    import copy
-
-    if not tool_schema.get("inputSchema", {}).get("properties"):
+    if plan is None:
         return
 
-    schema_properties = tool_schema["inputSchema"]["properties"]
-    required_fields = tool_schema["inputSchema"].get("required", [])
+    # The top level behaves like any other object schema
+    _validate_nested_structure(plan, arguments)
 
-    # Handle top-level properties
-    for key, schema in schema_properties.items():
-        if key not in arguments:
-            if "default" in schema:
-                default_value = schema["default"]
-                if isinstance(default_value, (dict, list)):
-                    arguments[key] = copy.deepcopy(default_value)
-                else:
-                    arguments[key] = default_value
-            elif key in required_fields:
-                raise Exception(f"Missing required argument: {key}")
-        else:
-            # Validate provided arguments
-            _validate_nested_structure(schema, arguments[key], key)
 
+# Index holding the configuration entries of each function kind
+_DISPATCH_INDEXES = {"tool": "tools", "resource": "resources", "prompt": "prompts"}
 
-@execute_decorator()
-def execute_tool_function(
-    partition_key: str,
-    name: str,
-    arguments: Dict[str, Any],
-    mcp_function_call_uuid: str = None,
-) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
-    try:
-        config = get_mcp_configuration_with_retry(partition_key)
-        tool = next(
-            (tool for tool in config["tools"] if tool["name"] == name),
-            {},
-        )
 
-        if arguments is None:
-            arguments = {}
+def _dispatch(
+    partition_key: str,
+    kind: str,
+    key: str,
+    invoke: Callable[[Dict[str, Any], Callable], Any],
+    post: Callable[[Dict[str, Any], Dict[str, Any], Any], Any],
+    pre: Optional[Callable[[Dict[str, Any]], None]] = None,
+    dispatch: Optional[Dict[str, Dict[Any, Dict[str, Any]]]] = None,
+) -> Any:
+    """
+    Resolve and run the function configured for a tool, resource or prompt.
 
-        # Validate arguments and set defaults using the tool schema
-        _validate_and_set_defaults(tool, arguments)
+    Args:
+        partition_key: Partition the configuration belongs to
+        kind: "tool", "resource" or "prompt"
+        key: Tool or prompt name, or resource URI
+        invoke: Calls the bound function given its module link
+        post: Wraps the raw result given the entry and module link
+        pre: Validates the configuration entry before the class is loaded
+        dispatch: Dispatch indexes already fetched by the caller
 
-        module_link = next(
-            (
-                module_link
-                for module_link in config["module_links"]
-                if module_link["name"] == name and module_link["type"] == "tool"
-            ),
-            {},
-        )
-        module = next(
-            (
-                module
-                for module in config["modules"]
-                if (
-                    module["module_name"] == module_link["module_name"]
-                    and module["class_name"] == module_link["class_name"]
-                )
-            ),
-            {},
-        )
-        tool_class = _get_class(
+    Returns:
+        The result returned by ``post``
+    """
+    try:
+        index = dispatch or get_mcp_dispatch_with_retry(partition_key)
+        entry = index[_DISPATCH_INDEXES[kind]].get(key)
+        if entry is None:
+            if kind == "resource":
+                raise KeyError(f"Unknown resource URI: {key}")
+            entry = {}
+
+        if pre is not None:
+            pre(entry)
+
+        name = entry["name"] if kind == "resource" else key
+        module_link = index["module_links"].get((name, kind), {})
+        module_key = (module_link.get("module_name"), module_link.get("class_name"))
+        module = index["modules"].get(module_key, {})
+        function_class = _get_class(
             module["package_name"],
             module["module_name"],
             module["class_name"],
             source=module.get("source"),
         )
 
-        if tool_class is None:
-            raise Exception(f"Failed to load tool class: {module['class_name']}")
+        if function_class is None:
+            raise Exception(f"Failed to load {kind} class: {module['class_name']}")
 
-        tool_obj = tool_class(
-            Config.logger, **Serializer.json_normalize(module["setting"])
-        )
+        function_obj = function_class(Config.logger, **_module_setting(index, module_key))
 
-        if hasattr(tool_obj, "endpoint_id") and hasattr(tool_obj, "part_id"):
+        if hasattr(function_obj, "endpoint_id") and hasattr(function_obj, "part_id"):
             if "#" in partition_key:
                 keys = partition_key.split("#")
-                tool_obj.endpoint_id = keys[0]
-                tool_obj.part_id = keys[1]
-            else:
-                tool_obj.endpoint_id = partition_key
-                tool_obj.part_id = None
-
-        tool_function = getattr(tool_obj, module_link["function_name"])
-
-        if module_link.get("is_async", False):
-            if Config.aws_lambda:
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, tool_function(**arguments))
-                    result = future.result()
-            else:
-                result = asyncio.run(tool_function(**arguments))
-        else:
-            result = tool_function(**arguments)
-
-        return_type = module_link["return_type"]
-
-        if return_type == "text":
-            # Handle dict result by converting to JSON representation
-            if isinstance(result, dict):
-                return [TextContent(type="text", text=Serializer.json_dumps(result))]
-            return [TextContent(type="text", text=str(result))]
-
-        elif return_type == "image":
-            # Handle image results
-            if isinstance(result, dict):
-                # Expected format: {"data": "base64_data", "mimeType": "image/png"}
-                return [
-                    ImageContent(
-                        type="image",
-                        data=result.get("data", ""),
-                        mimeType=result.get("mimeType", "image/png"),
-                    )
-                ]
-            elif isinstance(result, str):
-                # Assume base64 encoded PNG if just string
-                return [ImageContent(type="image", data=result, mimeType="image/png")]
+                function_obj.endpoint_id = keys[0]
+                function_obj.part_id = keys[1]
             else:
-                raise Exception(f"Invalid image result format: {type(result)}")
+                function_obj.endpoint_id = partition_key
+                function_obj.part_id = None
 
-        elif return_type == "embedded_resource":
-            return _create_embedded_resource_from_result(result)
-
-        else:
-            raise Exception(
-                f"Invalid return type {return_type}. Supported types: text, image, resource"
-            )
+        result = invoke(
+            module_link, getattr(function_obj, module_link["function_name"])
+        )
+        return post(entry, module_link, result)
 
     except Exception as e:
         log = traceback.format_exc()
@@ -630,6 +1387,83 @@ def execute_tool_function(
         raise e
 
 
+def _tool_content(
+    tool: Dict[str, Any], module_link: Dict[str, Any], result: Any
+) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+    """Wrap a tool result according to the module link's return type."""
+    return_type = module_link["return_type"]
+
+    if return_type == "text":
+        # Handle dict result by converting to JSON representation
+        if isinstance(result, dict):
+            return [TextContent(type="text", text=_json_dumps(result))]
+        return [TextContent(type="text", text=str(result))]
+
+    elif return_type == "image":
+        # Handle image results
+        if isinstance(result, dict):
+            # Expected format: {"data": "base64_data", "mimeType": "image/png"}
+            return [
+                ImageContent(
+                    type="image",
+                    data=result.get("data", ""),
+                    mimeType=result.get("mimeType", "image/png"),
+                )
+            ]
+        elif isinstance(result, str):
+            # Assume base64 encoded PNG if just string
+            return [ImageContent(type="image", data=result, mimeType="image/png")]
+        else:
+            raise Exception(f"Invalid image result format: {type(result)}")
+
+    elif return_type == "embedded_resource":
+        return _create_embedded_resource_from_result(result)
+
+    else:
+        raise Exception(
+            f"Invalid return type {return_type}. Supported types: text, image, resource"
+        )
+
+
+@execute_decorator()
+def execute_tool_function(
+    partition_key: str,
+    name: str,
+    arguments: Dict[str, Any],
+    mcp_function_call_uuid: str = None,
+    _mcp_dispatch: Dict[str, Dict[Any, Dict[str, Any]]] = None,
+) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
+    if arguments is None:
+        arguments = {}
+
+    def invoke(module_link: Dict[str, Any], tool_function: Callable) -> Any:
+        if module_link.get("is_async", False):
+            return _run_tool_coroutine(tool_function(**arguments))
+        return tool_function(**arguments)
+
+    def validate(tool: Dict[str, Any]) -> None:
+        # Validate arguments and set defaults using the tool schema
+        validator = dispatch["validators"].get(name)
+        if validator is None:
+            _validate_and_set_defaults(dispatch["argument_plans"].get(name), arguments)
+            return
+        try:
+            validator(arguments)
+        except fastjsonschema.JsonSchemaException as e:
+            raise Exception(f"Invalid arguments: {e.message}")
+
+    dispatch = _mcp_dispatch or get_mcp_dispatch_with_retry(partition_key)
+    return _dispatch(
+        partition_key,
+        "tool",
+        name,
+        invoke,
+        _tool_content,
+        pre=validate,
+        dispatch=dispatch,
+    )
+
+
 def get_mcp_configuration_by_module(
     package_name: str, module_name: str, source: str = None
 ) -> Dict[str, Any]:
@@ -644,6 +1478,28 @@ def get_mcp_configuration_by_module(
         raise e
 
 
+# Texts longer than this are not sniffed for JSON and default to text/plain
+_JSON_SNIFF_LIMIT = 64 * 1024
+_JSON_LEADING_CHARS = frozenset('{["tfn-0123456789')
+
+
+def _looks_like_json(text: str) -> bool:
+    """Check whether a text is a JSON document, parsing it only when its
+    first character can start one"""
+    if len(text) > _JSON_SNIFF_LIMIT:
+        return False
+
+    stripped = text.lstrip()
+    if not stripped or stripped[0] not in _JSON_LEADING_CHARS:
+        return False
+
+    try:
+        orjson.loads(stripped)
+    except orjson.JSONDecodeError:
+        return False
+    return True
+
+
 def _create_embedded_resource_from_result(result) -> list[EmbeddedResource]:
     """Convert function result to EmbeddedResource with proper TextResourceContents."""
     # Extract resource data and determine content
@@ -658,15 +1514,13 @@ def _create_embedded_resource_from_result(result) -> list[EmbeddedResource]:
 
         # Auto-detect JSON if no mimeType provided
         if not mime_type:
-            try:
-                Serializer.json_loads(text_content)
-                mime_type = "application/json"
-            except:
-                mime_type = "text/plain"
+            mime_type = (
+                "application/json" if _looks_like_json(text_content) else "text/plain"
+            )
     else:
         # Convert to JSON string (for dicts) or plain string
         if isinstance(resource_data, dict):
-            text_content = Serializer.json_dumps(resource_data)
+            text_content = _json_dumps(resource_data)
             mime_type = resource_data.get("mimeType", "application/json")
         else:
             text_content = str(resource_data)
@@ -686,304 +1540,330 @@ def _create_embedded_resource_from_result(result) -> list[EmbeddedResource]:
 def execute_resource_function(
     partition_key: str,
     uri: str,
+    _mcp_dispatch: Dict[str, Dict[Any, Dict[str, Any]]] = None,
 ) -> ReadResourceResult:
-    try:
-        config = get_mcp_configuration_with_retry(partition_key)
-        resource = next(
-            (resource for resource in config["resources"] if resource["uri"] == uri),
-            {},
-        )
+    # Return properly structured ReadResourceResult according to MCP specification
+    return _dispatch(
+        partition_key,
+        "resource",
+        uri,
+        lambda module_link, resource_function: resource_function(uri),
+        lambda resource, module_link, result: ReadResourceResult(
+            contents=[
+                TextResourceContents(uri=uri, mimeType="text/plain", text=str(result))
+            ]
+        ),
+        dispatch=_mcp_dispatch,
+    )
 
-        module_link = next(
-            (
-                module_link
-                for module_link in config["module_links"]
-                if module_link["name"] == resource["name"]
-                and module_link["type"] == "resource"
-            ),
-            {},
-        )
 
-        module = next(
-            (
-                module
-                for module in config["modules"]
-                if (
-                    module["module_name"] == module_link["module_name"]
-                    and module["class_name"] == module_link["class_name"]
+def _check_prompt_arguments(
+    required: Sequence[str], arguments: Dict[str, Any]
+) -> None:
+    """Check if arguments have all required arguments."""
+    for name in required:
+        if name not in arguments:
+            raise Exception(f"Missing required argument {name}")
+
+
+@execute_decorator()
+def execute_prompt_function(
+    partition_key: str,
+    name: str,
+    arguments: Dict[str, Any],
+    _mcp_dispatch: Dict[str, Dict[Any, Dict[str, Any]]] = None,
+) -> GetPromptResult:
+    dispatch = _mcp_dispatch or get_mcp_dispatch_with_retry(partition_key)
+    return _dispatch(
+        partition_key,
+        "prompt",
+        name,
+        lambda module_link, prompt_function: prompt_function(name, **arguments),
+        lambda prompt, module_link, result: GetPromptResult(
+            description=prompt["description"],
+            messages=[
+                PromptMessage(
+                    role="user",
+                    content=TextContent(type="text", text=result),
                 )
-            ),
-            {},
-        )
+            ],
+        ),
+        pre=lambda prompt: _check_prompt_arguments(
+            dispatch["prompt_arguments"].get(name, ()), arguments
+        ),
+        dispatch=dispatch,
+    )
 
-        resource_class = _get_class(
-            module["package_name"],
-            module["module_name"],
-            module["class_name"],
-            source=module.get("source"),
+
+def _function_call_resource(
+    mcp_function_call_uuid: str, status: str, notes: Optional[str]
+) -> List[EmbeddedResource]:
+    """Reference to a function call that has not completed (yet)"""
+    return [
+        EmbeddedResource(
+            type="resource",
+            resource=TextResourceContents(
+                uri=f"mcp://function-call/{mcp_function_call_uuid}",
+                text=_json_dumps(
+                    {
+                        "mcp_function_call_uuid": mcp_function_call_uuid,
+                        "status": status,
+                        "notes": notes,
+                    }
+                ),
+                mimeType="application/json",
+            ),
         )
+    ]
 
-        if resource_class is None:
-            raise Exception(f"Failed to load resource class: {module['class_name']}")
 
-        resource_obj = resource_class(
-            Config.logger,
-            **Serializer.json_normalize(module["setting"]),
-        )
+def _invoke_lambda_batch(
+    partition_key: str, batch: List[Dict[str, Any]]
+) -> List[Optional[Exception]]:
+    """
+    Send queued tool calls of a partition to the worker Lambda.
 
-        if hasattr(resource_obj, "endpoint_id") and hasattr(resource_obj, "part_id"):
-            if "#" in partition_key:
-                keys = partition_key.split("#")
-                resource_obj.endpoint_id = keys[0]
-                resource_obj.part_id = keys[1]
-            else:
-                resource_obj.endpoint_id = partition_key
-                resource_obj.part_id = None
+    Calls are packed into ``{"batch": [...]}`` payloads under the Event
+    payload limit; a chunk of one is sent as plain params.
+    """
+    endpoint_id = partition_key.split("#")[0] if "#" in partition_key else partition_key
+    part_id = partition_key.split("#")[1] if "#" in partition_key else None
+    context = {
+        "partition_key": partition_key,
+        "logger": Config.logger,
+        "endpoint_id": endpoint_id,
+        "part_id": part_id,
+        "setting": Config.setting,
+    }
 
-        resource_function = getattr(resource_obj, module_link["function_name"])
+    chunks: List[List[int]] = []
+    size = LAMBDA_EVENT_PAYLOAD_LIMIT
+    for position, params in enumerate(batch):
+        params_size = len(_json_dumps(params))
+        if size + params_size > LAMBDA_EVENT_PAYLOAD_LIMIT:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(position)
+        size += params_size
+
+    results: List[Optional[Exception]] = [None] * len(batch)
+    for chunk in chunks:
+        try:
+            Invoker.invoke_funct_on_aws_lambda(
+                context,
+                "async_execute_tool_function",
+                params=(
+                    batch[chunk[0]]
+                    if len(chunk) == 1
+                    else {"batch": [batch[position] for position in chunk]}
+                ),
+                execute_mode=Config.setting.get("execute_mode"),
+                aws_lambda=Config.aws_lambda,
+                invocation_type="Event",
+            )
+        except Exception as e:
+            for position in chunk:
+                results[position] = e
 
-        result = resource_function(uri)
+    return results
 
-        # Return properly structured ReadResourceResult according to MCP specification
-        return ReadResourceResult(
-            contents=[
-                TextResourceContents(uri=uri, mimeType="text/plain", text=str(result))
-            ]
-        )
 
-    except Exception as e:
-        log = traceback.format_exc()
-        Config.logger.error(log)
-        raise e
+# Coalesces bursts of tool calls into one Event invocation per partition
+_lambda_invoke_batcher = MicroBatcher(
+    _invoke_lambda_batch,
+    interval=0.02,
+    max_batch_size=25,
+    name="mcp-lambda-invoker",
+)
 
 
-@execute_decorator()
-def execute_prompt_function(
+async def _lambda_dispatch(
     partition_key: str,
     name: str,
     arguments: Dict[str, Any],
-) -> GetPromptResult:
-    try:
-        config = get_mcp_configuration_with_retry(partition_key)
-        prompt = next(
-            (prompt for prompt in config["prompts"] if prompt["name"] == name),
-            {},
-        )
-
-        # Check if arguments have all required arguments
-        if prompt.get("arguments"):
-            for arg in prompt["arguments"]:
-                if arg.get("required", False) and arg["name"] not in arguments.keys():
-                    raise Exception(f"Missing required argument {arg['name']}")
-
-        module_link = next(
-            (
-                module_link
-                for module_link in config["module_links"]
-                if module_link["name"] == name and module_link["type"] == "prompt"
-            ),
-            {},
+    mcp_function_call: Dict[str, Any],
+) -> None:
+    """Invoke the tool on a separate Lambda with an ``Event`` invocation"""
+    Config.logger.debug("Queueing Lambda invocation")
+    await asyncio.wrap_future(
+        _lambda_invoke_batcher.submit(
+            partition_key,
+            {
+                "name": name,
+                "arguments": arguments,
+                "mcp_function_call_uuid": mcp_function_call["mcpFunctionCallUuid"],
+                # Only the fields the worker needs; arguments are already above
+                "mcp_function_call": {
+                    "partitionKey": mcp_function_call["partitionKey"],
+                    "mcpFunctionCallUuid": mcp_function_call["mcpFunctionCallUuid"],
+                    "status": mcp_function_call["status"],
+                },
+            },
         )
+    )
 
-        module = next(
-            (
-                module
-                for module in config["modules"]
-                if (
-                    module["module_name"] == module_link["module_name"]
-                    and module["class_name"] == module_link["class_name"]
-                )
-            ),
-            {},
-        )
 
-        prompt_class = _get_class(
-            module["package_name"],
-            module["module_name"],
-            module["class_name"],
-            source=module.get("source"),
-        )
+async def _thread_dispatch(
+    partition_key: str,
+    name: str,
+    arguments: Dict[str, Any],
+    mcp_function_call: Dict[str, Any],
+) -> concurrent.futures.Future:
+    """Run the tool on the bounded background pool"""
+    Config.logger.debug("Dispatching execute_tool_function to the tool pool")
+    future = _get_tool_pool().submit(
+        execute_tool_function,
+        partition_key,
+        name,
+        arguments,
+        mcp_function_call_uuid=mcp_function_call["mcpFunctionCallUuid"],
+        _mcp_function_call_prefetched=mcp_function_call,
+    )
 
-        if prompt_class is None:
-            raise Exception(f"Failed to load prompt class: {module['class_name']}")
+    # Track the call until it finishes; done-callbacks keep this O(1)
+    active = _track_future(future)
+    Config.logger.debug(
+        "Tool function %s submitted to the tool pool (active calls: %d)",
+        name,
+        active,
+    )
 
-        prompt_obj = prompt_class(
-            Config.logger,
-            **Serializer.json_normalize(module["setting"]),
-        )
+    return future
 
-        if hasattr(prompt_obj, "endpoint_id") and hasattr(prompt_obj, "part_id"):
-            if "#" in partition_key:
-                keys = partition_key.split("#")
-                prompt_obj.endpoint_id = keys[0]
-                prompt_obj.part_id = keys[1]
-            else:
-                prompt_obj.endpoint_id = partition_key
-                prompt_obj.part_id = None
 
-        prompt_function = getattr(prompt_obj, module_link["function_name"])
+# (Config.aws_lambda, dispatcher) chosen on first use; Config is initialized
+# after import, so the choice is re-evaluated if the Lambda client changes
+_dispatcher = (None, None)
 
-        result = prompt_function(name, **arguments)
 
-        return GetPromptResult(
-            description=prompt["description"],
-            messages=[
-                PromptMessage(
-                    role="user",
-                    content=TextContent(type="text", text=result),
-                )
-            ],
-        )
+def _get_dispatcher():
+    """Return the dispatch function for the current Config.aws_lambda"""
+    global _dispatcher
 
-    except Exception as e:
-        log = traceback.format_exc()
-        Config.logger.error(log)
-        raise e
+    aws_lambda, dispatch = _dispatcher
+    if dispatch is None or aws_lambda is not Config.aws_lambda:
+        dispatch = _lambda_dispatch if Config.aws_lambda else _thread_dispatch
+        _dispatcher = (Config.aws_lambda, dispatch)
+    return dispatch
 
 
 # TODO: Rebuild the function to support async execution with proper thread management and cleanup.
-def async_execute_tool_function(
+async def async_execute_tool_function(
     partition_key: str,
     name: str,
     arguments: Dict[str, Any],
 ):
+    # Storage and Lambda calls are blocking, so they run in worker threads to
+    # keep the server loop free while this call is in flight
     if arguments.get("mcp_function_call_uuid"):
-        mcp_function_call = _check_existing_function_call(
-            partition_key, arguments["mcp_function_call_uuid"]
+        mcp_function_call = await asyncio.to_thread(
+            _check_existing_function_call,
+            partition_key,
+            arguments["mcp_function_call_uuid"],
         )
 
-        if mcp_function_call["status"] == "completed":
+        status = mcp_function_call["status"]
+        if status == "completed":
             Config.logger.info(
-                f"Tool function {name} already completed. Skipping execution."
+                "Tool function %s already completed. Skipping execution.", name
             )
             return [TextContent(type="text", text=mcp_function_call["content"])]
         else:
-            return [
-                EmbeddedResource(
-                    type="resource",
-                    resource=TextResourceContents(
-                        uri=f"mcp://function-call/{mcp_function_call['mcpFunctionCallUuid']}",
-                        text=Serializer.json_dumps(
-                            {
-                                "mcp_function_call_uuid": mcp_function_call[
-                                    "mcpFunctionCallUuid"
-                                ],
-                                "status": mcp_function_call["status"],
-                                "notes": mcp_function_call.get("notes"),
-                            }
-                        ),
-                        mimeType="application/json",
-                    ),
-                )
-            ]
+            return _function_call_resource(
+                mcp_function_call["mcpFunctionCallUuid"],
+                status,
+                mcp_function_call.get("notes"),
+            )
 
-    Config.logger.info("Making GraphQL call to insert/update MCP function")
-    mcp_function_call = _insert_update_mcp_function_call(
+    # A pooled worker resolves the configuration right away; start fetching it
+    # while the call record is written
+    if not Config.aws_lambda:
+        _prewarm_in_background(partition_key)
+
+    Config.logger.debug("Making GraphQL call to insert/update MCP function")
+    mcp_function_call = await _insert_update_mcp_function_call_async(
         partition_key,
         **{"name": name, "mcp_type": "tool", "arguments": arguments},
     )
-    Config.logger.info("Successfully created MCP function call")
-
-    params = {
-        "name": name,
-        "arguments": arguments,
-        "mcp_function_call_uuid": mcp_function_call["mcpFunctionCallUuid"],
-    }
-
-    if Config.aws_lambda:
-        # Invoke Lambda function asynchronously
-        Config.logger.info("Invoking Lambda function asynchronously")
-        endpoint_id = (
-            partition_key.split("#")[0] if "#" in partition_key else partition_key
-        )
-        part_id = partition_key.split("#")[1] if "#" in partition_key else None
-        context = {
-            "partition_key": partition_key,
-            "logger": Config.logger,
-            "endpoint_id": endpoint_id,
-            "part_id": part_id,
-            "setting": Config.setting,
-        }
-        Invoker.invoke_funct_on_aws_lambda(
-            context,
-            "async_execute_tool_function",
-            params=params,
-            execute_mode=Config.setting.get("execute_mode"),
-            aws_lambda=Config.aws_lambda,
-            invocation_type="Event",
-        )
-    else:
-        Config.logger.info("Dispatching execute_tool_function in a separate thread")
-        thread = threading.Thread(
-            target=execute_tool_function,
-            args=(
-                partition_key,
-                name,
-                arguments,
-            ),
-            kwargs={"mcp_function_call_uuid": mcp_function_call["mcpFunctionCallUuid"]},
-            daemon=False,  # Changed to False so thread won't be killed when main process exits
+    Config.logger.debug("Successfully created MCP function call")
+
+    mcp_function_call_uuid = mcp_function_call["mcpFunctionCallUuid"]
+    status, notes = mcp_function_call["status"], mcp_function_call.get("notes")
+    deadline = time.monotonic() + Config.tool_poll_timeout
+
+    # With a completion queue configured, Lambda workers push their result and
+    # the record is only read once, if no notification arrives in time
+    notified = bool(Config.aws_lambda and Config.aws_sqs)
+    if notified:
+        status_poller.listen(
+            Config.aws_sqs,
+            Config.tool_completion_queue_url,
+            max_age=Config.tool_poll_timeout + 60,
         )
-        thread.start()
 
-        # Register thread for tracking
-        _active_threads.append(thread)
-        Config.logger.info(
-            f"Tool function {name} started in background thread (active threads: {len(_active_threads)})"
+    # Register before dispatching so a fast worker's completion is not missed
+    event = status_poller.register(
+        partition_key, mcp_function_call_uuid, poll=not notified
+    )
+    try:
+        worker = await _get_dispatcher()(
+            partition_key, name, arguments, mcp_function_call
         )
 
-        # Clean up completed threads
-        _active_threads[:] = [t for t in _active_threads if t.is_alive()]
+        # Fast path: a pooled worker that already finished has written its
+        # terminal status, so read it instead of waiting for the next poll
+        if not event.is_set() and worker is not None and worker.done():
+            status_poller.notify(
+                await asyncio.to_thread(
+                    _check_existing_function_call,
+                    partition_key,
+                    mcp_function_call_uuid,
+                )
+            )
 
-    # Poll for function completion with 60 second timeout
-    # Checks the status of the function call periodically and returns the result when complete
-    # If timeout is reached, breaks the loop and returns a resource reference instead
-    start_time = time.time()
-    while time.time() - start_time <= 3:
-        mcp_function_call = _check_existing_function_call(
-            partition_key, mcp_function_call["mcpFunctionCallUuid"]
-        )
-        if mcp_function_call["status"] == "completed":
-            Config.logger.info(f"Tool function {name} completed. Returning result.")
-            return [TextContent(type="text", text=mcp_function_call["content"])]
-        elif mcp_function_call["status"] == "failed":
-            Config.logger.info(f"Tool function {name} failed. Returning error message.")
-            break
-        else:
-            # Update the status to "in_process" if the current status is "initial"
-            if mcp_function_call["status"] == "initial":
-                mcp_function_call = _insert_update_mcp_function_call(
+        # Otherwise wait for the status poller (or completion listener) to
+        # observe a terminal status until Config.tool_poll_timeout elapses. If
+        # the timeout is reached, a resource reference is returned instead
+        record = status_poller.result(partition_key, mcp_function_call_uuid) or {}
+        if not event.is_set() and record.get("status") not in TERMINAL_STATUSES:
+            try:
+                await asyncio.wait_for(
+                    event.wait(), timeout=max(0.0, deadline - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                if notified:
+                    status_poller.notify(
+                        await asyncio.to_thread(
+                            _check_existing_function_call,
+                            partition_key,
+                            mcp_function_call_uuid,
+                        )
+                    )
+
+        record = status_poller.result(partition_key, mcp_function_call_uuid) or {}
+        if record.get("status") in TERMINAL_STATUSES:
+            if record.get("contentInS3") or "content" not in record:
+                record = await asyncio.to_thread(
+                    _check_existing_function_call,
                     partition_key,
-                    **{
-                        "mcp_function_call_uuid": mcp_function_call[
-                            "mcpFunctionCallUuid"
-                        ],
-                        "status": "in_process",
-                    },
+                    mcp_function_call_uuid,
                 )
 
-            Config.logger.info(
-                f"Tool function {name} not completed yet. Waiting for result."
-            )
-            time.sleep(0.5)
+            if record["status"] == "completed":
+                Config.logger.info("Tool function %s completed. Returning result.", name)
+                return [TextContent(type="text", text=record["content"])]
 
-    Config.logger.warning(f"Tool function {name} timed out after 3 seconds")
+            Config.logger.info("Tool function %s failed. Returning error message.", name)
+            status, notes = record["status"], record.get("notes")
+        else:
+            if record:
+                status, notes = record["status"], record.get("notes")
+            Config.logger.warning(
+                "Tool function %s timed out after %s seconds",
+                name,
+                Config.tool_poll_timeout,
+            )
+    finally:
+        status_poller.unregister(partition_key, mcp_function_call_uuid)
 
-    return [
-        EmbeddedResource(
-            type="resource",
-            resource=TextResourceContents(
-                uri=f"mcp://function-call/{mcp_function_call['mcpFunctionCallUuid']}",
-                text=Serializer.json_dumps(
-                    {
-                        "mcp_function_call_uuid": mcp_function_call[
-                            "mcpFunctionCallUuid"
-                        ],
-                        "status": mcp_function_call["status"],
-                        "notes": mcp_function_call.get("notes"),
-                    }
-                ),
-                mimeType="application/json",
-            ),
-        )
-    ]
+    return _function_call_resource(mcp_function_call_uuid, status, notes)
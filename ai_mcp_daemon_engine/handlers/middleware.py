@@ -2,7 +2,9 @@
 from __future__ import print_function
 
 __author__ = "bibow"
-from typing import Iterable, List
+import hashlib
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
@@ -13,14 +15,47 @@ from .config import Config
 from .jwt_cognito import verify_cognito_jwt
 from .jwt_local import verify_local_jwt
 
+# Verified claims keyed by a digest of (auth mode, token); entries live for
+# at most _TOKEN_CACHE_TTL seconds and never past the token's own "exp"
+_TOKEN_CACHE: Dict[bytes, Tuple[Dict[str, Any], float]] = {}
+_TOKEN_CACHE_TTL = 60
+_TOKEN_CACHE_SIZE = 4096
+
+
+def _token_key(mode: str, token: str) -> bytes:
+    return hashlib.blake2b(f"{mode}:{token}".encode(), digest_size=16).digest()
+
+
+def _cached_claims(key: bytes) -> Optional[Dict[str, Any]]:
+    entry = _TOKEN_CACHE.get(key)
+    if entry is None:
+        return None
+    if entry[1] <= time.time():
+        _TOKEN_CACHE.pop(key, None)
+        return None
+    return entry[0]
+
+
+def _cache_claims(key: bytes, claims: Dict[str, Any]) -> None:
+    expires_at = time.time() + _TOKEN_CACHE_TTL
+    if isinstance(claims.get("exp"), (int, float)):
+        expires_at = min(expires_at, claims["exp"])
+
+    if len(_TOKEN_CACHE) >= _TOKEN_CACHE_SIZE:
+        # Dicts keep insertion order; drop the oldest entry
+        _TOKEN_CACHE.pop(next(iter(_TOKEN_CACHE)), None)
+    _TOKEN_CACHE[key] = (claims, expires_at)
+
 
 class FlexJWTMiddleware(BaseHTTPMiddleware):
     def __init__(self, app, public_paths: Iterable[str] = ()):
         super().__init__(app)
         self.public_paths: List[str] = list(public_paths) + ["/auth"]
+        # str.startswith takes a tuple and checks every prefix in C
+        self._public_prefixes = tuple(self.public_paths)
 
     async def dispatch(self, request: Request, call_next):
-        if any(request.url.path.startswith(p) for p in self.public_paths):
+        if request.url.path.startswith(self._public_prefixes):
             return await call_next(request)
 
         auth = request.headers.get("authorization")
@@ -32,11 +67,19 @@ class FlexJWTMiddleware(BaseHTTPMiddleware):
         token = auth.split(" ", 1)[1]
         mode = Config.auth_provider
 
+        # Skip signature verification for a token verified moments ago
+        key = _token_key(mode, token)
+        claims = _cached_claims(key)
+        if claims is not None:
+            request.state.user = claims
+            return await call_next(request)
+
         try:
             if mode == "cognito":
                 claims = await verify_cognito_jwt(token)
             else:
                 claims = verify_local_jwt(token)
+            _cache_claims(key, claims)
             request.state.user = claims
         except HTTPException as e:
             return JSONResponse(
@@ -29,6 +29,10 @@ from ..types.mcp_function_call import MCPFunctionCallListType, MCPFunctionCallTy
 from ..types.mcp_module import MCPModuleListType, MCPModuleType
 from ..types.mcp_setting import MCPSettingListType, MCPSettingType
 
+# (second, reply) of the last ping; swapped as one tuple so readers on other
+# threads never see a half-updated pair
+_ping_reply = (0, "")
+
 
 def type_class():
     return [
@@ -107,7 +111,12 @@ class Query(ObjectType):
     )
 
     def resolve_ping(self, info: ResolveInfo) -> str:
-        return f"Hello at {time.strftime('%X')}!!"
+        global _ping_reply
+
+        now = int(time.time())
+        if _ping_reply[0] != now:
+            _ping_reply = (now, f"Hello at {time.strftime('%X')}!!")
+        return _ping_reply[1]
 
     def resolve_mcp_function(
         self, info: ResolveInfo, **kwargs: Dict[str, Any]
@@ -5,147 +5,312 @@ from __future__ import annotations
 __author__ = "bibow"
 
 import asyncio
+import bisect
 import logging
 from collections import deque
-from itertools import count
-from typing import Any, Dict, Set, Tuple, Optional
+from itertools import count, islice
+from operator import itemgetter
+from typing import Any, Dict, List, Set, Tuple, Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+
+def format_sse_event(
+    message: Dict[str, Any],
+    message_id: Optional[int] = None,
+    event: Optional[str] = None,
+) -> bytes:
+    """Encode a message as one SSE event; the id lets clients resume via
+    Last-Event-ID and stays in the payload for clients that read it there"""
+    if message_id is not None and isinstance(message, dict):
+        message = dict(message, id=message_id)
+    data = orjson.dumps(jsonable_encoder(message), option=orjson.OPT_NON_STR_KEYS)
+    frame = b"data: " + data + b"\n\n"
+    if message_id is not None:
+        frame = b"id: %d\n" % message_id + frame
+    if event is not None:
+        frame = b"event: " + event.encode() + b"\n" + frame
+    return frame
+
+
+class ClientChannel:
+    """Per-client message buffer: a deque plus a wake-up event.
+
+    Lighter than ``asyncio.Queue`` on the fan-out path: ``put_nowait`` is a
+    length check, a deque append and an event set, with no getter futures
+    or task accounting. It has a single consumer, the client's SSE stream.
+    """
+
+    __slots__ = ("_buffer", "_event", "_maxsize")
+
+    def __init__(self, maxsize: int):
+        self._buffer: deque = deque()
+        self._event = asyncio.Event()
+        self._maxsize = maxsize
+
+    def put_nowait(self, message: Any) -> None:
+        """Buffer a message, raising asyncio.QueueFull when the client lags"""
+        if len(self._buffer) >= self._maxsize:
+            raise asyncio.QueueFull
+        self._buffer.append(message)
+        self._event.set()
+
+    async def get(self) -> Any:
+        """Wait for and return the oldest buffered message"""
+        while not self._buffer:
+            self._event.clear()
+            await self._event.wait()
+        return self._buffer.popleft()
+
+
+class _Client:
+    """A connected SSE client; the user bucket is found through ``username``"""
+
+    __slots__ = ("id", "username", "queue")
+
+    def __init__(self, client_id: int, username: str, queue: ClientChannel):
+        self.id = client_id
+        self.username = username
+        self.queue = queue
 
 
 class SSEManager:
-    """Thread-safe SSE client manager with proper lifecycle management"""
+    """Thread-safe SSE client manager with proper lifecycle management
+
+    Client queues are spread over ``shards`` dicts keyed by ``client_id % shards``,
+    each guarded by its own lock, so registering or messaging one client only
+    waits on its shard. The user -> clients index has a lock of its own.
+
+    Every shard also keeps an immutable tuple snapshot of its clients, replaced
+    whenever the shard changes, which broadcasts iterate without any lock.
+    """
     
-    def __init__(self, max_history: int = 1000, max_queue_size: int = 100):
-        self._clients: Dict[int, asyncio.Queue] = {}
+    __slots__ = (
+        "_shards",
+        "_shard_locks",
+        "_snapshots",
+        "_cleanup_tasks",
+        "_user_clients",
+        "_user_lock",
+        "_message_history",
+        "_max_history_event_size",
+        "_client_id_seq",
+        "_message_id_seq",
+        "_max_queue_size",
+        "_logger",
+    )
+    
+    def __init__(
+        self,
+        max_history: int = 1000,
+        max_queue_size: int = 100,
+        shards: int = 16,
+        max_history_event_size: int = 64 * 1024,
+    ):
+        self._shards: List[Dict[int, _Client]] = [{} for _ in range(shards)]
+        self._shard_locks: List[asyncio.Lock] = [
+            asyncio.Lock() for _ in range(shards)
+        ]
+        self._snapshots: List[Tuple[_Client, ...]] = [
+            () for _ in range(shards)
+        ]
+        self._cleanup_tasks: Set[asyncio.Task] = set()
         self._user_clients: Dict[str, Set[int]] = {}
-        self._lock = asyncio.Lock()
+        self._user_lock = asyncio.Lock()
+        # (message_id, encoded event) pairs, ascending by id; events larger
+        # than max_history_event_size are delivered but not kept for replay
         self._message_history: deque = deque(maxlen=max_history)
+        self._max_history_event_size = max_history_event_size
         self._client_id_seq = count(1)
         self._message_id_seq = count(1)
         self._max_queue_size = max_queue_size
         self._logger = logging.getLogger(__name__)
     
-    async def add_client(self, username: str) -> Tuple[int, asyncio.Queue]:
+    def _shard(self, client_id: int) -> Tuple[int, Dict[int, _Client], asyncio.Lock]:
+        index = client_id % len(self._shards)
+        return index, self._shards[index], self._shard_locks[index]
+    
+    def _refresh_snapshot(self, index: int) -> None:
+        """Republish a shard's snapshot; call with the shard lock held"""
+        self._snapshots[index] = tuple(self._shards[index].values())
+    
+    async def add_client(self, username: str) -> Tuple[int, ClientChannel]:
         """Add a new SSE client and return client_id and queue"""
-        async with self._lock:
-            client_id = next(self._client_id_seq)
-            queue = asyncio.Queue(maxsize=self._max_queue_size)
-            self._clients[client_id] = queue
+        # itertools.count is atomic, so ids and channels are made outside the lock
+        client_id = next(self._client_id_seq)
+        client = _Client(client_id, username, ClientChannel(self._max_queue_size))
+        index, clients, lock = self._shard(client_id)
+        async with lock:
+            clients[client_id] = client
+            self._refresh_snapshot(index)
+        async with self._user_lock:
             self._user_clients.setdefault(username, set()).add(client_id)
-            self._logger.info(f"Added SSE client {client_id} for user {username}")
-            return client_id, queue
+        self._logger.info(f"Added SSE client {client_id} for user {username}")
+        return client_id, client.queue
     
     async def remove_client(self, client_id: int, username: str) -> bool:
         """Remove a client and cleanup associated data"""
-        async with self._lock:
-            removed = self._clients.pop(client_id, None) is not None
-            
-            if username in self._user_clients:
-                self._user_clients[username].discard(client_id)
-                if not self._user_clients[username]:
-                    del self._user_clients[username]
-            
-            if removed:
-                self._logger.info(f"Removed SSE client {client_id} for user {username}")
-            
-            return removed
+        index, clients, lock = self._shard(client_id)
+        async with lock:
+            client = clients.pop(client_id, None)
+            if client is None:
+                return False
+            self._refresh_snapshot(index)
+        
+        async with self._user_lock:
+            self._unlink_user(client)
+        
+        self._logger.info(f"Removed SSE client {client_id} for user {username}")
+        return True
     
     async def get_clients_for_user(self, username: str) -> Set[int]:
         """Get all client IDs for a specific user"""
-        async with self._lock:
+        async with self._user_lock:
             return self._user_clients.get(username, set()).copy()
     
     async def broadcast_message(self, message: Dict[str, Any]) -> int:
         """Broadcast message to all clients and return success count"""
-        message_id = next(self._message_id_seq)
-        message_with_id = dict(message, id=message_id)
-        self._message_history.append(message_with_id)
+        # Nobody is listening: skip the id, encoding, history and logging.
+        # A client registering concurrently may miss this best-effort event.
+        if not any(self._snapshots):
+            return 0
+        
+        event = self._record(message)
         
         success_count = 0
         dead_clients = []
         
-        async with self._lock:
-            for client_id, queue in list(self._clients.items()):
+        # Snapshots are immutable, so no lock is held during the fan-out
+        for snapshot in self._snapshots:
+            for client in snapshot:
                 try:
-                    queue.put_nowait(message_with_id)
+                    client.queue.put_nowait(event)
                     success_count += 1
                 except asyncio.QueueFull:
-                    self._logger.warning(f"Queue full for client {client_id}, marking for removal")
-                    dead_clients.append(client_id)
+                    self._logger.warning(f"Queue full for client {client.id}, marking for removal")
+                    dead_clients.append(client.id)
                 except Exception as e:
-                    self._logger.error(f"Error broadcasting to client {client_id}: {e}")
-                    dead_clients.append(client_id)
+                    self._logger.error(f"Error broadcasting to client {client.id}: {e}")
+                    dead_clients.append(client.id)
         
-        # Clean up dead clients
-        for cid in dead_clients:
-            await self._cleanup_dead_client(cid)
+        # Clean up dead clients in one pass, off the broadcaster's path
+        if dead_clients:
+            task = asyncio.create_task(self._cleanup_dead_clients_bulk(dead_clients))
+            self._cleanup_tasks.add(task)
+            task.add_done_callback(self._cleanup_tasks.discard)
         
         self._logger.debug(f"Broadcast message to {success_count} clients, removed {len(dead_clients)} dead clients")
         return success_count
     
     async def send_to_client(self, client_id: int, message: Dict[str, Any]) -> bool:
         """Send message to a specific client"""
-        message_id = next(self._message_id_seq)
-        message_with_id = dict(message, id=message_id)
-        self._message_history.append(message_with_id)
+        # A stale client costs one lookup: no id, encoding or history entry
+        client = self._client(client_id)
+        if client is None:
+            return False
         
-        async with self._lock:
-            queue = self._clients.get(client_id)
-            if not queue:
-                return False
-            
-            try:
-                queue.put_nowait(message_with_id)
-                return True
-            except asyncio.QueueFull:
-                self._logger.warning(f"Queue full for client {client_id}, removing")
-                await self._cleanup_dead_client(client_id)
-                return False
-            except Exception as e:
-                self._logger.error(f"Error sending to client {client_id}: {e}")
-                await self._cleanup_dead_client(client_id)
-                return False
+        return await self._deliver(client, self._record(message))
     
     async def send_to_user(self, username: str, message: Dict[str, Any]) -> bool:
         """Send message to all clients of a specific user"""
         client_ids = await self.get_clients_for_user(username)
-        if not client_ids:
+        clients = [client for client in map(self._client, client_ids) if client]
+        if not clients:
             return False
         
-        delivered = False
-        for client_id in client_ids:
-            success = await self.send_to_client(client_id, message)
-            delivered = delivered or success
+        # One id and history entry for the message, whatever the tab count
+        event = self._record(message)
+        results = await asyncio.gather(
+            *(self._deliver(client, event) for client in clients),
+            return_exceptions=True,
+        )
+        return any(result is True for result in results)
+    
+    def _client(self, client_id: int) -> Optional[_Client]:
+        return self._shards[client_id % len(self._shards)].get(client_id)
+    
+    def _record(self, message: Dict[str, Any]) -> bytes:
+        """Give a message its id, encode it once and keep it for replay.
+
+        Every send path goes through here, so each logical message gets one
+        id and at most one history entry however many clients receive it.
+        """
+        message_id = next(self._message_id_seq)
+        event = format_sse_event(message, message_id)
+        if len(event) <= self._max_history_event_size:
+            self._message_history.append((message_id, event))
+        return event
+    
+    async def _deliver(self, client: _Client, event: bytes) -> bool:
+        """Queue an encoded event for a client, dropping the client on failure"""
+        try:
+            client.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self._logger.warning(f"Queue full for client {client.id}, removing")
+        except Exception as e:
+            self._logger.error(f"Error sending to client {client.id}: {e}")
         
-        return delivered
+        await self._cleanup_dead_client(client.id)
+        return False
     
     async def get_missed_messages(self, last_event_id: Optional[str]) -> list:
-        """Get messages missed since last_event_id"""
+        """Get the encoded events missed since last_event_id"""
         if not last_event_id or not last_event_id.isdigit():
             return []
         
-        last_id = int(last_event_id)
-        return [msg for msg in self._message_history if msg.get("id", 0) > last_id]
+        # Ids are allocated in order, so the missed messages are a suffix
+        start = bisect.bisect_right(
+            self._message_history, int(last_event_id), key=itemgetter(0)
+        )
+        return [event for _, event in islice(self._message_history, start, None)]
     
     async def _cleanup_dead_client(self, client_id: int):
         """Internal method to clean up a dead client"""
-        self._clients.pop(client_id, None)
+        await self._cleanup_dead_clients_bulk([client_id])
+    
+    async def _cleanup_dead_clients_bulk(self, client_ids: List[int]):
+        """Clean up dead clients, taking each affected lock once"""
+        dead = set(client_ids)
+        by_shard: Dict[int, List[int]] = {}
+        for client_id in dead:
+            by_shard.setdefault(client_id % len(self._shards), []).append(client_id)
+        
+        removed: List[_Client] = []
+        for index, shard_client_ids in by_shard.items():
+            async with self._shard_locks[index]:
+                clients = self._shards[index]
+                for client_id in shard_client_ids:
+                    client = clients.pop(client_id, None)
+                    if client is not None:
+                        removed.append(client)
+                self._refresh_snapshot(index)
         
         # Remove from user mappings
-        for username, client_set in list(self._user_clients.items()):
-            client_set.discard(client_id)
+        if removed:
+            async with self._user_lock:
+                for client in removed:
+                    self._unlink_user(client)
+    
+    def _unlink_user(self, client: _Client) -> None:
+        """Drop a client from its user's bucket; call with _user_lock held"""
+        client_set = self._user_clients.get(client.username)
+        if client_set is not None:
+            client_set.discard(client.id)
             if not client_set:
-                del self._user_clients[username]
+                del self._user_clients[client.username]
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get SSE manager statistics"""
-        async with self._lock:
+        async with self._user_lock:
             user_distribution = {
                 username: len(client_ids) 
                 for username, client_ids in self._user_clients.items()
             }
             
             return {
-                "total_clients": len(self._clients),
+                "total_clients": sum(len(clients) for clients in self._shards),
                 "total_users": len(self._user_clients),
                 "user_distribution": user_distribution,
                 "message_history_size": len(self._message_history),
@@ -154,8 +319,11 @@ class SSEManager:
     
     async def cleanup_all(self):
         """Cleanup all clients and resources"""
-        async with self._lock:
-            self._clients.clear()
+        for index, lock in enumerate(self._shard_locks):
+            async with lock:
+                self._shards[index].clear()
+                self._refresh_snapshot(index)
+        async with self._user_lock:
             self._user_clients.clear()
             self._message_history.clear()
             self._logger.info("Cleaned up all SSE clients and resources")
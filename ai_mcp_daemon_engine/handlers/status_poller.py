@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+__author__ = "bibow"
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+
+class StatusPoller:
+    """Coalesces status reads for in-flight MCP function calls.
+
+    Every dispatcher waiting on an async tool call registers its
+    ``(partition_key, mcp_function_call_uuid)`` here instead of polling
+    storage on its own. A single background thread reads all pending
+    records with one ``BatchGetItem`` per interval and sets the per-call
+    ``asyncio.Event`` on the waiter's loop once a record reaches a
+    terminal status.
+
+    The interval backs off exponentially from ``min_interval`` to
+    ``max_interval`` and is reset whenever a call is registered or a
+    pending record changes status, so fast tools are picked up almost
+    immediately while slow ones do not flood the table.
+
+    Calls registered with ``poll=False`` are left out of the batch reads;
+    they complete through ``notify`` from the SQS completion listener.
+    Containers may share the completion queue, so the listener only
+    deletes the messages of calls waiting in this process. Other messages
+    are made visible again shortly for the container that owns them, and
+    are deleted once they are older than ``max_age`` seconds, when no
+    waiter can still be expecting them.
+    """
+
+    def __init__(self, min_interval: float = 0.025, max_interval: float = 0.5):
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._attempts = 0
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._events: Dict[
+            Tuple[str, str], Tuple[asyncio.AbstractEventLoop, asyncio.Event, bool]
+        ] = {}
+        self._results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._listener: Optional[threading.Thread] = None
+        self._logger = logging.getLogger(__name__)
+
+    def register(
+        self, partition_key: str, mcp_function_call_uuid: str, poll: bool = True
+    ) -> asyncio.Event:
+        """Start tracking a function call and return its completion event.
+
+        Must be called from the event loop that will await the event.
+        """
+        key = (partition_key, mcp_function_call_uuid)
+        with self._lock:
+            waiter = self._events.get(key)
+            if waiter is None:
+                waiter = self._events[key] = (
+                    asyncio.get_running_loop(),
+                    asyncio.Event(),
+                    poll,
+                )
+            if not poll:
+                return waiter[1]
+            self._attempts = 0
+            self._ensure_started()
+        self._wakeup.set()
+        return waiter[1]
+
+    def unregister(self, partition_key: str, mcp_function_call_uuid: str) -> None:
+        """Stop tracking a function call and drop its cached record"""
+        key = (partition_key, mcp_function_call_uuid)
+        with self._lock:
+            self._events.pop(key, None)
+            self._results.pop(key, None)
+
+    def result(
+        self, partition_key: str, mcp_function_call_uuid: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return the latest record read for a function call, if any"""
+        return self._results.get((partition_key, mcp_function_call_uuid))
+
+    def notify(self, record: Dict[str, Any]) -> bool:
+        """Apply a record read or pushed for a pending function call.
+
+        Returns True when the record changed the status of a pending call.
+        """
+        key = (record.get("partitionKey"), record.get("mcpFunctionCallUuid"))
+        with self._lock:
+            waiter = self._events.get(key)
+            if waiter is None:
+                return False
+            previous = self._results.get(key)
+            self._results[key] = record
+
+        if record.get("status") in TERMINAL_STATUSES:
+            loop, event, _ = waiter
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The waiter's loop has been closed
+                self.unregister(*key)
+
+        return previous is not None and previous["status"] != record.get("status")
+
+    def listen(self, aws_sqs: Any, queue_url: str, max_age: float = 900) -> None:
+        """Start the SQS long-poller feeding completion notifications"""
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen,
+                    args=(aws_sqs, queue_url, max_age),
+                    name="mcp-completion-listener",
+                    daemon=True,
+                )
+                self._listener.start()
+
+    def _pending(self, record: Dict[str, Any]) -> bool:
+        key = (record.get("partitionKey"), record.get("mcpFunctionCallUuid"))
+        with self._lock:
+            return key in self._events
+
+    def _listen(self, aws_sqs: Any, queue_url: str, max_age: float) -> None:
+        while True:
+            try:
+                response = aws_sqs.receive_message(
+                    QueueUrl=queue_url,
+                    WaitTimeSeconds=3,
+                    MaxNumberOfMessages=10,
+                    AttributeNames=["SentTimestamp"],
+                )
+                consumed, released = [], []
+                for message in response.get("Messages", []):
+                    body = orjson.loads(message["Body"])
+                    # Unwrap the SNS envelope unless raw delivery is enabled
+                    if "TopicArn" in body and "Message" in body:
+                        body = orjson.loads(body["Message"])
+
+                    sent = int(message.get("Attributes", {}).get("SentTimestamp", 0))
+                    if self._pending(body):
+                        self.notify(body)
+                        consumed.append(message)
+                    elif time.time() - sent / 1000 > max_age:
+                        # Every waiter for it has given up by now
+                        consumed.append(message)
+                    else:
+                        # Another container is waiting for this one
+                        released.append(message)
+
+                if consumed:
+                    aws_sqs.delete_message_batch(
+                        QueueUrl=queue_url,
+                        Entries=[
+                            {
+                                "Id": str(index),
+                                "ReceiptHandle": message["ReceiptHandle"],
+                            }
+                            for index, message in enumerate(consumed)
+                        ],
+                    )
+                if released:
+                    aws_sqs.change_message_visibility_batch(
+                        QueueUrl=queue_url,
+                        Entries=[
+                            {
+                                "Id": str(index),
+                                "ReceiptHandle": message["ReceiptHandle"],
+                                "VisibilityTimeout": 1,
+                            }
+                            for index, message in enumerate(released)
+                        ],
+                    )
+            except Exception as e:
+                self._logger.warning("Failed to receive completion messages: %s", e)
+                time.sleep(1)
+
+    def _ensure_started(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="mcp-status-poller", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                keys = [key for key, waiter in self._events.items() if waiter[2]]
+
+            if not keys:
+                # Sleep until the next registration
+                self._wakeup.wait()
+                continue
+
+            try:
+                if self._poll(keys):
+                    self._attempts = 0
+            except Exception as e:
+                self._logger.warning("Failed to poll function call status: %s", e)
+
+            interval = self._min_interval * (2**self._attempts)
+            if interval < self._max_interval:
+                self._attempts += 1
+            self._wakeup.wait(min(interval, self._max_interval))
+
+    def _poll(self, keys: list) -> bool:
+        """Read the pending records and report whether any status changed"""
+        from ..models.mcp_function_call import MCPFunctionCallModel
+
+        changed = False
+        # pynamodb splits the keys into BatchGetItem pages of 100
+        for item in MCPFunctionCallModel.batch_get(keys):
+            changed |= self.notify(
+                {
+                    "partitionKey": item.partition_key,
+                    "mcpFunctionCallUuid": item.mcp_function_call_uuid,
+                    "status": item.status,
+                    "content": item.content,
+                    "contentInS3": item.content_in_s3,
+                    "notes": item.notes,
+                }
+            )
+
+        return changed
+
+
+# Global status poller instance
+status_poller = StatusPoller()
@@ -5,11 +5,15 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import asyncio
-import json
 import logging
 import os
 import sys
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 from silvaengine_utility import Debugger, Graphql, HttpResponse, Invoker, Serializer
 
@@ -97,52 +101,157 @@ def deploy() -> List:
     ]
 
 
+# Event loop per calling thread serving mcp() requests; kept for the life of
+# the thread so loop-bound clients are reused instead of rebuilt by
+# asyncio.run per call, while concurrent invocations still run in parallel
+_mcp_loops = threading.local()
+
+
+def _get_mcp_loop() -> asyncio.AbstractEventLoop:
+    loop = getattr(_mcp_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _mcp_loops.loop = asyncio.new_event_loop()
+    return loop
+
+
+def _run_mcp(coroutine: Any) -> Any:
+    """Run a coroutine to completion from synchronous code.
+
+    Uses the thread's own loop unless the caller is already inside a running
+    loop, which cannot be re-entered; that case keeps the baseline helper.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _get_mcp_loop().run_until_complete(coroutine)
+    return Invoker.sync_call_async_compatible(coroutine)
+
+
+# Pool running the calls of batched invocations, shared across invocations
+# of a warm worker instead of built per batch
+_batch_pool: Optional[ThreadPoolExecutor] = None
+_batch_pool_lock = threading.Lock()
+
+
+def _get_batch_pool() -> ThreadPoolExecutor:
+    global _batch_pool
+
+    if _batch_pool is None:
+        with _batch_pool_lock:
+            if _batch_pool is None:
+                _batch_pool = ThreadPoolExecutor(
+                    max_workers=Config.tool_pool_size,
+                    thread_name_prefix="mcp-batch",
+                )
+    return _batch_pool
+
+
 class AIMCPDaemonEngine(object):
     def __init__(self, logger: logging.Logger, **setting: Dict[str, Any]) -> None:
         # Initialize configuration via the Config class
         Config.initialize(logger, **setting)
 
+        if Config.prewarm_partition_keys:
+            from .handlers.mcp_utility import (
+                prewarm_configurations,
+                start_configuration_refresher,
+            )
+
+            prewarm_configurations(Config.prewarm_partition_keys)
+            start_configuration_refresher()
+
         self.transport = str(setting.get("transport", "")).strip()
         self.port = setting.get("port", 8000)
         self.logger = logger
         self.setting = setting
+        # Read on every request by _apply_partition_defaults
+        self._default_endpoint_id = setting.get("endpoint_id")
+        self._default_part_id = setting.get("part_id")
 
     def _apply_partition_defaults(self, params: Dict[str, Any]) -> None:
         """
         Ensure endpoint_id/part_id defaults and assemble partition_key.
         """
-        if params.get("endpoint_id") is None:
-            params["endpoint_id"] = self.setting.get("endpoint_id")
-
-        part_id = params.get("metadata", {}).get("part_id", self.setting.get("part_id"))
         endpoint_id = params.get("endpoint_id")
-        params["partition_key"] = f"{endpoint_id}"
+        if endpoint_id is None:
+            endpoint_id = params["endpoint_id"] = self._default_endpoint_id
+
+        metadata = params.get("metadata")
+        part_id = (
+            metadata.get("part_id", self._default_part_id)
+            if metadata
+            else self._default_part_id
+        )
 
-        if params.get("context") is None:
-            params["context"] = {}
+        context = params.get("context")
+        if context is None:
+            context = params["context"] = {}
 
         if part_id:
-            params["context"]["partition_key"] = f"{endpoint_id}#{part_id}"
-            params["partition_key"] = f"{endpoint_id}#{part_id}"
+            partition_key = f"{endpoint_id}#{part_id}"
+            context["partition_key"] = partition_key
+        else:
+            partition_key = str(endpoint_id)
+        params["partition_key"] = partition_key
 
     def mcp(self, **params: Dict[str, Any]) -> Dict[str, Any]:
         from .handlers.mcp_server import process_mcp_message
 
         self._apply_partition_defaults(params)
 
-        return HttpResponse.format_response(
-            data=Invoker.sync_call_async_compatible(
-                process_mcp_message(
-                    str(params.get("partition_key", "")).strip(),
-                    params,
-                )
+        result = _run_mcp(
+            process_mcp_message(
+                str(params.get("partition_key", "")).strip(),
+                params,
             )
         )
+        return HttpResponse.format_response(data=result)
 
     def async_execute_tool_function(self, **params: Dict[str, Any]) -> None:
         self._apply_partition_defaults(params)
 
         partition_key = params.pop("partition_key", None)
+        batch = params.pop("batch", None)
+
+        if batch is None:
+            self._execute_tool_call(partition_key, params)
+            return
+
+        # Calls coalesced by the dispatcher into one invocation run side by
+        # side. They share the function's timeout, so whatever is unfinished
+        # at the deadline is recorded as failed before the invocation is cut
+        # off and leaves it in_process
+        pool = _get_batch_pool()
+        futures = {
+            pool.submit(self._execute_tool_call, partition_key, item): item
+            for item in batch
+        }
+        done, not_done = wait(futures, timeout=Config.lambda_batch_deadline)
+        for future in done:
+            if future.exception() is not None:
+                self.logger.error("Batched tool call failed: %s", future.exception())
+
+        if not_done:
+            from .handlers.mcp_utility import mark_function_call_failed
+
+            for future in not_done:
+                # Calls still queued behind the pool are dropped outright
+                future.cancel()
+                uuid = futures[future].get("mcp_function_call_uuid")
+                if uuid is None:
+                    continue
+                try:
+                    mark_function_call_failed(
+                        partition_key,
+                        uuid,
+                        f"Batched invocation did not finish within "
+                        f"{Config.lambda_batch_deadline}s",
+                    )
+                except Exception as e:
+                    self.logger.error("Failed to mark %s as failed: %s", uuid, e)
+        return
+
+    def _execute_tool_call(self, partition_key: str, params: Dict[str, Any]) -> None:
         name = params.get("name", None)
         arguments = params.get("arguments", None)
         mcp_function_call_uuid = params.get("mcp_function_call_uuid", None)
@@ -159,8 +268,8 @@ class AIMCPDaemonEngine(object):
             name,
             arguments,
             mcp_function_call_uuid=mcp_function_call_uuid,
+            _mcp_function_call_prefetched=params.get("mcp_function_call"),
         )
-        return
 
     def mcp_core_graphql(self, **params: Dict[str, Any]) -> Any:
         if Config.mcp_core:
@@ -190,13 +299,23 @@ class AIMCPDaemonEngine(object):
 
                 self.logger.info("Running in SSE mode...")
                 """Run SSE server using uvicorn."""
+                # server.serve() runs on the loop created below rather than
+                # one set up by uvicorn, so uvloop is installed as the policy
+                try:
+                    import uvloop
+
+                    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+                except ImportError:
+                    # uvicorn[standard] ships uvloop everywhere but Windows
+                    self.logger.info("uvloop not available, using asyncio loop")
+
                 config = uvicorn.Config(
                     app=app,
                     host="0.0.0.0",
                     port=self.port,
                     log_level="info",
                     access_log=True,
-                    loop="asyncio",
+                    loop="auto",
                 )
                 server = uvicorn.Server(config)
                 Invoker.sync_call_async_compatible(server.serve())
@@ -234,7 +353,9 @@ def main():
             "transport": transport,
             "port": int(os.getenv("PORT", "8000")),
             "mcp_configuration": (
-                json.load(open(mcp_config_file, "r")) if mcp_config_file else None
+                orjson.loads(Path(mcp_config_file).read_bytes())
+                if mcp_config_file
+                else None
             ),
             "auth_provider": os.getenv("AUTH_PROVIDER", "local").lower(),
             "local_user_file": os.getenv("LOCAL_USER_FILE"),
@@ -246,6 +367,21 @@ def main():
             "funct_bucket_name": os.getenv("FUNCT_BUCKET_NAME"),
             "funct_zip_path": os.getenv("FUNCT_ZIP_PATH"),
             "funct_extract_path": os.getenv("FUNCT_EXTRACT_PATH"),
+            "tool_poll_timeout": float(os.getenv("TOOL_POLL_TIMEOUT", "3")),
+            "tool_pool_size": int(os.getenv("MCP_TOOL_POOL", "32")),
+            "tool_completion_topic_arn": os.getenv("TOOL_COMPLETION_TOPIC_ARN"),
+            "tool_completion_queue_url": os.getenv("TOOL_COMPLETION_QUEUE_URL"),
+            "lambda_batch_deadline": float(os.getenv("LAMBDA_BATCH_DEADLINE", "840")),
+            "prewarm_partition_keys": os.getenv("MCP_PREWARM_PARTITIONS"),
+            "config_refresh_seconds": float(os.getenv("CONFIG_REFRESH_SECONDS", "0")),
+            "sync_call_writes": os.getenv("SYNC_CALL_WRITES", "false").lower()
+            == "true",
+            "tracking_enabled": os.getenv("MCP_TRACKING_ENABLED", "true").lower()
+            == "true",
+            "strict_argument_validation": os.getenv(
+                "STRICT_ARGUMENT_VALIDATION", "false"
+            ).lower()
+            == "true",
         },
     )
     ai_mcp_daemon_engine.daemon()
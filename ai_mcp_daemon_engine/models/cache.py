@@ -4,8 +4,7 @@ from __future__ import annotations
 __author__ = "bibow"
 
 import logging
-from functools import lru_cache
-from typing import Any, Dict, Optional, Set
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
 from silvaengine_dynamodb_base.cache_utils import (
     CacheConfigResolvers,
@@ -22,42 +21,46 @@ def _extract_module_setting_ids(raw_classes: Any) -> Set[str]:
         if class_item is None:
             continue
 
-        payload = class_item
-        if hasattr(class_item, "as_dict"):
+        # One getattr per probe; hasattr would look the attribute up twice
+        as_dict = getattr(class_item, "as_dict", None)
+        if as_dict is not None:
             try:
-                payload = class_item.as_dict()
+                payload = as_dict()
             except Exception:
                 payload = None
-        elif hasattr(class_item, "attribute_values"):
-            payload = getattr(class_item, "attribute_values", None)
+        else:
+            payload = getattr(class_item, "attribute_values", class_item)
 
-        if payload is None:
+        # Only setting_id is needed, so read it through the payload's own
+        # .get (dicts and MapAttribute-like objects) instead of copying it
+        get = getattr(payload, "get", None)
+        if get is None:
             continue
 
-        if not isinstance(payload, dict):
-            try:
-                payload = dict(payload)
-            except Exception:
-                continue
-
-        setting_id = payload.get("setting_id")
+        setting_id = get("setting_id")
         if isinstance(setting_id, str) and setting_id:
             setting_ids.add(setting_id)
 
     return setting_ids
 
 
-@lru_cache(maxsize=1)
-def _get_cascading_cache_purger() -> CascadingCachePurger:
-    from ..handlers.config import Config
+_PURGE_FN: Optional[Callable[..., Dict[str, Any]]] = None
 
-    return CascadingCachePurger(
-        CacheConfigResolvers(
-            get_cache_entity_config=Config.get_cache_entity_config,
-            get_cache_relationships=Config.get_cache_relationships,
-            queries_module_base="ai_mcp_daemon_engine.queries",
-        )
-    )
+
+def _get_purge_fn() -> Callable[..., Dict[str, Any]]:
+    """Build the cascading purger once and cache its bound purge method"""
+    global _PURGE_FN
+    if _PURGE_FN is None:
+        from ..handlers.config import Config
+
+        _PURGE_FN = CascadingCachePurger(
+            CacheConfigResolvers(
+                get_cache_entity_config=Config.get_cache_entity_config,
+                get_cache_relationships=Config.get_cache_relationships,
+                queries_module_base="ai_mcp_daemon_engine.queries",
+            )
+        ).purge_entity_cascading_cache
+    return _PURGE_FN
 
 
 def purge_entity_cascading_cache(
@@ -68,8 +71,7 @@ def purge_entity_cascading_cache(
     cascade_depth: int = 3,
 ) -> Dict[str, Any]:
     """Universal function to purge entity cache with cascading child cache support."""
-    purger = _get_cascading_cache_purger()
-    return purger.purge_entity_cascading_cache(
+    return (_PURGE_FN or _get_purge_fn())(
         logger,
         entity_type,
         context_keys=context_keys,
@@ -78,7 +80,91 @@ def purge_entity_cascading_cache(
     )
 
 
+def _purge_module_settings(
+    logger: logging.Logger,
+    partition_key: str,
+    entity: Any,
+    kwargs: Dict[str, Any],
+) -> None:
+    """Purge the settings referenced by a module's classes."""
+    try:
+        classes = getattr(entity, "classes", None) if entity else None
+        if not classes:
+            classes = kwargs.get("classes")
+
+        for setting_id in _extract_module_setting_ids(classes):
+            purge_entity_cascading_cache(
+                logger,
+                entity_type="mcp_setting",
+                context_keys={"partition_key": partition_key},
+                entity_keys={"setting_id": setting_id},
+                cascade_depth=3,
+            )
+    except Exception:
+        pass
+
+
+# entity_type -> (entity key name, follow-up purge run after the entity's own)
+_PURGE_SPECS: Dict[str, Tuple[str, Optional[Callable[..., None]]]] = {
+    "mcp_module": ("module_name", _purge_module_settings),
+    "mcp_function": ("name", None),
+    "mcp_setting": ("setting_id", None),
+    "mcp_function_call": ("mcp_function_call_uuid", None),
+}
+
+
+def _make_purger(
+    entity_type: str,
+    key_name: str,
+    follow_up: Optional[Callable[..., None]] = None,
+) -> Callable[[Any, Dict[str, Any]], None]:
+    """Build the purge called by a model's purge_cache decorator."""
+
+    def purger(info: Any, kwargs: Dict[str, Any]) -> None:
+        partition_key = info.context.get("partition_key") or kwargs.get(
+            "partition_key"
+        )
+
+        # Try the entity parameter first (updates), then kwargs (creates/deletes)
+        entity = kwargs.get("entity")
+        key_value = getattr(entity, key_name, None) if entity else None
+        if not key_value:
+            key_value = kwargs.get(key_name)
+
+        # Only purge if we have the required keys
+        if not (key_value and partition_key):
+            return
+
+        logger = info.context.get("logger")
+        purge_entity_cascading_cache(
+            logger,
+            entity_type=entity_type,
+            context_keys={"partition_key": partition_key},
+            entity_keys={key_name: key_value},
+            cascade_depth=3,
+        )
+        if follow_up is not None:
+            follow_up(logger, partition_key, entity, kwargs)
+
+    purger.__name__ = purger.__qualname__ = f"purge_{entity_type}_cache"
+    return purger
+
+
+purge_mcp_module_cache = _make_purger("mcp_module", *_PURGE_SPECS["mcp_module"])
+purge_mcp_function_cache = _make_purger(
+    "mcp_function", *_PURGE_SPECS["mcp_function"]
+)
+purge_mcp_setting_cache = _make_purger("mcp_setting", *_PURGE_SPECS["mcp_setting"])
+purge_mcp_function_call_cache = _make_purger(
+    "mcp_function_call", *_PURGE_SPECS["mcp_function_call"]
+)
+
+
 __all__ = [
     "purge_entity_cascading_cache",
+    "purge_mcp_module_cache",
+    "purge_mcp_function_cache",
+    "purge_mcp_setting_cache",
+    "purge_mcp_function_call_cache",
     "_extract_module_setting_ids",
 ]
@@ -5,7 +5,6 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import functools
-import traceback
 from typing import Any, Dict
 
 import pendulum
@@ -16,6 +15,7 @@ from pynamodb.attributes import (
     UnicodeAttribute,
     UTCDateTimeAttribute,
 )
+from pynamodb.exceptions import GetError
 from pynamodb.indexes import AllProjection, LocalSecondaryIndex
 from silvaengine_dynamodb_base import (
     BaseModel,
@@ -26,10 +26,16 @@ from silvaengine_dynamodb_base import (
 )
 from silvaengine_utility import method_cache
 from silvaengine_utility.serializer import Serializer
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 from ..handlers.config import Config
 from ..types.mcp_function import MCPFunctionListType, MCPFunctionType
+from .cache import purge_mcp_function_cache
 
 
 class MCPTypeIndex(LocalSecondaryIndex):
@@ -68,6 +74,40 @@ class MCPFunctionModel(BaseModel):
     mcp_type_index = MCPTypeIndex()
 
 
+# Marks a key absent from kwargs, so falsy values such as False still count
+_MISSING = object()
+
+# Attributes an update may set, paired with their model descriptors
+_UPDATE_FIELDS = (
+    ("mcp_type", MCPFunctionModel.mcp_type),
+    ("description", MCPFunctionModel.description),
+    ("data", MCPFunctionModel.data),
+    ("annotations", MCPFunctionModel.annotations),
+    ("module_name", MCPFunctionModel.module_name),
+    ("class_name", MCPFunctionModel.class_name),
+    ("function_name", MCPFunctionModel.function_name),
+    ("return_type", MCPFunctionModel.return_type),
+    ("is_async", MCPFunctionModel.is_async),
+)
+
+# String and boolean attributes passed through to MCPFunctionType as is
+_NORMALIZE_SCALAR_KEYS = frozenset(
+    {
+        "partition_key",
+        "name",
+        "mcp_type",
+        "description",
+        "annotations",
+        "module_name",
+        "class_name",
+        "function_name",
+        "return_type",
+        "is_async",
+        "updated_by",
+    }
+)
+
+
 def purge_cache():
     def actual_decorator(original_function):
         @functools.wraps(original_function)
@@ -77,37 +117,11 @@ def purge_cache():
                 result = original_function(*args, **kwargs)
 
                 # Then purge cache after successful operation
-                from ..models.cache import purge_entity_cascading_cache
-
-                # Get entity keys from kwargs or entity parameter
-                entity_keys = {}
-                partition_key = args[0].context.get("partition_key") or kwargs.get(
-                    "partition_key"
-                )
-
-                # Try to get from entity parameter first (for updates)
-                entity = kwargs.get("entity")
-                if entity:
-                    entity_keys["name"] = getattr(entity, "name", None)
-
-                # Fallback to kwargs (for creates/deletes)
-                if not entity_keys.get("name"):
-                    entity_keys["name"] = kwargs.get("name")
-
-                # Only purge if we have the required keys
-                if entity_keys.get("name") and partition_key:
-                    purge_entity_cascading_cache(
-                        args[0].context.get("logger"),
-                        entity_type="mcp_function",
-                        context_keys={"partition_key": partition_key},
-                        entity_keys=entity_keys,
-                        cascade_depth=3,
-                    )
+                purge_mcp_function_cache(args[0], kwargs)
 
                 return result
             except Exception as e:
-                log = traceback.format_exc()
-                args[0].context.get("logger").error(log)
+                args[0].context.get("logger").exception("purge_cache failed")
                 raise e
 
         return wrapper_function
@@ -115,16 +129,19 @@ def purge_cache():
     return actual_decorator
 
 
-@retry(
-    reraise=True,
-    wait=wait_exponential(multiplier=1, max=60),
-    stop=stop_after_attempt(5),
-)
+# Cache hits skip the retry wrapper; only failed reads are retried, and
+# a missing item (DoesNotExist) is not a failed read
 @method_cache(
     ttl=Config.get_cache_ttl(),
     cache_name=Config.get_cache_name("models", "mcp_function"),
     cache_enabled=Config.is_cache_enabled,
 )
+@retry(
+    reraise=True,
+    wait=wait_exponential(multiplier=1, max=60),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception_type(GetError),
+)
 def get_mcp_function(partition_key: str, name: str) -> MCPFunctionModel:
     return MCPFunctionModel.get(partition_key, name)
 
@@ -137,27 +154,30 @@ def get_mcp_function_type(
     info: ResolveInfo, mcp_function: MCPFunctionModel
 ) -> MCPFunctionType:
     try:
-        return MCPFunctionType(
-            **Serializer.json_normalize(
-                mcp_function.__dict__["attribute_values"],
-            )
-        )
+        # Scalars are already JSON-native; only the rest need normalizing
+        values = {}
+        nested = {}
+        for key, value in mcp_function.attribute_values.items():
+            if key in _NORMALIZE_SCALAR_KEYS:
+                values[key] = value
+            else:
+                nested[key] = value
+        values.update(Serializer.json_normalize(nested))
+        return MCPFunctionType(**values)
     except Exception as e:
-        log = traceback.format_exc()
-        info.context.get("logger").exception(log)
+        info.context.get("logger").exception("get_mcp_function_type failed")
         raise e
 
 
 def resolve_mcp_function(
     info: ResolveInfo, **kwargs: Dict[str, Any]
 ) -> MCPFunctionType | None:
-    count = get_mcp_function_count(info.context["partition_key"], kwargs["name"])
-    if count == 0:
+    try:
+        mcp_function = get_mcp_function(info.context["partition_key"], kwargs["name"])
+    except MCPFunctionModel.DoesNotExist:
         return None
 
-    return get_mcp_function_type(
-        info, get_mcp_function(info.context["partition_key"], kwargs["name"])
-    )
+    return get_mcp_function_type(info, mcp_function)
 
 
 @monitor_decorator
@@ -168,33 +188,36 @@ def resolve_mcp_function(
 )
 def resolve_mcp_function_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
     partition_key = info.context["partition_key"]
+    if not partition_key:
+        # Never fall back to a full table scan
+        raise ValueError("partition_key is required to list MCP functions")
+
     mcp_type = kwargs.get("mcp_type")
     description = kwargs.get("desc")
     module_name = kwargs.get("module_name")
     class_name = kwargs.get("class_name")
     function_name = kwargs.get("function_name")
-    args = []
-    inquiry_funct = MCPFunctionModel.scan
+    args = [partition_key, None]
+    inquiry_funct = MCPFunctionModel.query
     count_funct = MCPFunctionModel.count
     the_filters = None
 
-    if partition_key:
-        args = [partition_key, None]
-        inquiry_funct = MCPFunctionModel.query
-
-        if mcp_type:
-            inquiry_funct = MCPFunctionModel.mcp_type_index.query
-            args[1] = MCPFunctionModel.mcp_type == mcp_type
-            count_funct = MCPFunctionModel.mcp_type_index.count
+    if mcp_type:
+        inquiry_funct = MCPFunctionModel.mcp_type_index.query
+        args[1] = MCPFunctionModel.mcp_type == mcp_type
+        count_funct = MCPFunctionModel.mcp_type_index.count
 
+    conditions = []
     if description:
-        the_filters &= MCPFunctionModel.description.contains(description)
+        conditions.append(MCPFunctionModel.description.contains(description))
     if module_name:
-        the_filters &= MCPFunctionModel.module_name == module_name
+        conditions.append(MCPFunctionModel.module_name == module_name)
     if class_name:
-        the_filters &= MCPFunctionModel.class_name == class_name
+        conditions.append(MCPFunctionModel.class_name == class_name)
     if function_name:
-        the_filters &= MCPFunctionModel.function_name == function_name
+        conditions.append(MCPFunctionModel.function_name == function_name)
+    for condition in conditions:
+        the_filters = condition if the_filters is None else the_filters & condition
     if the_filters is not None:
         args.append(the_filters)
 
@@ -215,14 +238,16 @@ def resolve_mcp_function_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> An
 def insert_update_mcp_function(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
     partition_key = kwargs.get("partition_key")
     name = kwargs.get("name")
+    now = pendulum.now("UTC")
+    mcp_function = kwargs.get("entity")
 
-    if kwargs.get("entity") is None:
+    if mcp_function is None:
         cols = {
             "mcp_type": kwargs["mcp_type"],
             "data": kwargs.get("data", {}),
             "updated_by": kwargs["updated_by"],
-            "created_at": pendulum.now("UTC"),
-            "updated_at": pendulum.now("UTC"),
+            "created_at": now,
+            "updated_at": now,
         }
         for key in [
             "description",
@@ -233,8 +258,9 @@ def insert_update_mcp_function(info: ResolveInfo, **kwargs: Dict[str, Any]) -> N
             "return_type",
             "is_async",
         ]:
-            if key in kwargs:
-                cols[key] = kwargs[key]
+            value = kwargs.get(key, _MISSING)
+            if value is not _MISSING:
+                cols[key] = value
 
         MCPFunctionModel(
             partition_key,
@@ -243,27 +269,15 @@ def insert_update_mcp_function(info: ResolveInfo, **kwargs: Dict[str, Any]) -> N
         ).save()
         return
 
-    mcp_function = kwargs.get("entity")
     actions = [
         MCPFunctionModel.updated_by.set(kwargs["updated_by"]),
-        MCPFunctionModel.updated_at.set(pendulum.now("UTC")),
+        MCPFunctionModel.updated_at.set(now),
     ]
 
-    field_map = {
-        "mcp_type": MCPFunctionModel.mcp_type,
-        "description": MCPFunctionModel.description,
-        "data": MCPFunctionModel.data,
-        "annotations": MCPFunctionModel.annotations,
-        "module_name": MCPFunctionModel.module_name,
-        "class_name": MCPFunctionModel.class_name,
-        "function_name": MCPFunctionModel.function_name,
-        "return_type": MCPFunctionModel.return_type,
-        "is_async": MCPFunctionModel.is_async,
-    }
-
-    for key, field in field_map.items():
-        if key in kwargs:
-            actions.append(field.set(kwargs[key]))
+    for key, field in _UPDATE_FIELDS:
+        value = kwargs.get(key, _MISSING)
+        if value is not _MISSING:
+            actions.append(field.set(value))
 
     mcp_function.update(actions=actions)
     return
@@ -5,7 +5,6 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import functools
-import traceback
 import uuid
 from typing import Any, Dict
 
@@ -32,6 +31,7 @@ from silvaengine_utility import method_cache
 from silvaengine_utility.serializer import Serializer
 from ..handlers.config import Config
 from ..types.mcp_function_call import MCPFunctionCallListType, MCPFunctionCallType
+from .cache import purge_mcp_function_call_cache
 
 
 class MCPTypeIndex(LocalSecondaryIndex):
@@ -110,41 +110,11 @@ def purge_cache():
                 result = original_function(*args, **kwargs)
 
                 # Then purge cache after successful operation
-                from ..models.cache import purge_entity_cascading_cache
-
-                # Get entity keys from kwargs or entity parameter
-                entity_keys = {}
-                partition_key = args[0].context.get("partition_key") or kwargs.get(
-                    "partition_key"
-                )
-
-                # Try to get from entity parameter first (for updates)
-                entity = kwargs.get("entity")
-                if entity:
-                    entity_keys["mcp_function_call_uuid"] = getattr(
-                        entity, "mcp_function_call_uuid", None
-                    )
-
-                # Fallback to kwargs (for creates/deletes)
-                if not entity_keys.get("mcp_function_call_uuid"):
-                    entity_keys["mcp_function_call_uuid"] = kwargs.get(
-                        "mcp_function_call_uuid"
-                    )
-
-                # Only purge if we have the required keys
-                if entity_keys.get("mcp_function_call_uuid") and partition_key:
-                    purge_entity_cascading_cache(
-                        args[0].context.get("logger"),
-                        entity_type="mcp_function_call",
-                        context_keys={"partition_key": partition_key},
-                        entity_keys=entity_keys,
-                        cascade_depth=3,
-                    )
+                purge_mcp_function_call_cache(args[0], kwargs)
 
                 return result
             except Exception as e:
-                log = traceback.format_exc()
-                args[0].context.get("logger").error(log)
+                args[0].context.get("logger").exception("purge_cache failed")
                 raise e
 
         return wrapper_function
@@ -193,8 +163,7 @@ def get_mcp_function_call_type(
             except Exception as e:
                 raise e
     except Exception as e:
-        log = traceback.format_exc()
-        info.context.get("logger").exception(log)
+        info.context.get("logger").exception("get_mcp_function_call_type failed")
         raise e
     mcp_function_call: Dict[str, Any] = mcp_function_call_model.__dict__[
         "attribute_values"
@@ -231,46 +200,49 @@ def resolve_mcp_function_call(
 )
 def resolve_mcp_function_call_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
     partition_key = info.context["partition_key"]
+    if not partition_key:
+        # Never fall back to a full table scan
+        raise ValueError("partition_key is required to list MCP function calls")
+
     mcp_type = kwargs.get("mcp_type")
     name = kwargs.get("name")
     status = kwargs.get("status")
     updated_at_gt = kwargs.get("updated_at_gt")
     updated_at_lt = kwargs.get("updated_at_lt")
 
-    args = []
-    inquiry_funct = MCPFunctionCallModel.scan
-    count_funct = MCPFunctionCallModel.count
     range_key_condition = None
-    if partition_key:
-        if updated_at_gt is not None and updated_at_lt is not None:
-            range_key_condition = MCPFunctionCallModel.updated_at.between(
-                updated_at_gt, updated_at_lt
-            )
-        elif updated_at_gt is not None:
-            range_key_condition = MCPFunctionCallModel.updated_at > updated_at_gt
-        elif updated_at_lt is not None:
-            range_key_condition = MCPFunctionCallModel.updated_at < updated_at_lt
-
-        args = [partition_key, range_key_condition]
-        inquiry_funct = MCPFunctionCallModel.updated_at_index.query
-        count_funct = MCPFunctionCallModel.updated_at_index.count
-
-        if mcp_type and range_key_condition is None:
-            inquiry_funct = MCPFunctionCallModel.mcp_type_index.query
-            args[1] = MCPFunctionCallModel.mcp_type == mcp_type
-            count_funct = MCPFunctionCallModel.mcp_type_index.count
-        elif name and range_key_condition is None:
-            inquiry_funct = MCPFunctionCallModel.name_index.query
-            args[1] = MCPFunctionCallModel.name == name
-            count_funct = MCPFunctionCallModel.name_index.count
+    if updated_at_gt is not None and updated_at_lt is not None:
+        range_key_condition = MCPFunctionCallModel.updated_at.between(
+            updated_at_gt, updated_at_lt
+        )
+    elif updated_at_gt is not None:
+        range_key_condition = MCPFunctionCallModel.updated_at > updated_at_gt
+    elif updated_at_lt is not None:
+        range_key_condition = MCPFunctionCallModel.updated_at < updated_at_lt
+
+    args = [partition_key, range_key_condition]
+    inquiry_funct = MCPFunctionCallModel.updated_at_index.query
+    count_funct = MCPFunctionCallModel.updated_at_index.count
+
+    if mcp_type and range_key_condition is None:
+        inquiry_funct = MCPFunctionCallModel.mcp_type_index.query
+        args[1] = MCPFunctionCallModel.mcp_type == mcp_type
+        count_funct = MCPFunctionCallModel.mcp_type_index.count
+    elif name and range_key_condition is None:
+        inquiry_funct = MCPFunctionCallModel.name_index.query
+        args[1] = MCPFunctionCallModel.name == name
+        count_funct = MCPFunctionCallModel.name_index.count
 
     the_filters = None
+    conditions = []
     if mcp_type and range_key_condition is not None:
-        the_filters &= MCPFunctionCallModel.mcp_type == mcp_type
+        conditions.append(MCPFunctionCallModel.mcp_type == mcp_type)
     if name and range_key_condition is not None:
-        the_filters &= MCPFunctionCallModel.name == name
+        conditions.append(MCPFunctionCallModel.name == name)
     if status:
-        the_filters &= MCPFunctionCallModel.status == status
+        conditions.append(MCPFunctionCallModel.status == status)
+    for condition in conditions:
+        the_filters = condition if the_filters is None else the_filters & condition
     if the_filters is not None:
         args.append(the_filters)
 
@@ -339,7 +311,7 @@ def insert_update_mcp_function_call(
                     f"Offloading content to S3. Error: {str(e)}"
                 )
 
-                s3_key = f"mcp_content/{kwargs['mcp_function_call_uuid']}.json"
+                s3_key = f"mcp_content/{mcp_function_call_uuid}.json"
                 _save_content_to_s3(
                     Serializer.json_dumps(cols.get("content")),
                     Config.funct_bucket_name,
@@ -5,7 +5,6 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import functools
-import traceback
 from typing import Any, Dict
 
 import pendulum
@@ -30,6 +29,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..handlers.config import Config
 from ..types.mcp_module import MCPModuleListType, MCPModuleType
+from .cache import purge_mcp_module_cache
 
 
 class MCPPackgeIndex(LocalSecondaryIndex):
@@ -71,62 +71,11 @@ def purge_cache():
                 result = original_function(*args, **kwargs)
 
                 # Then purge cache after successful operation
-                from ..models.cache import (
-                    _extract_module_setting_ids,
-                    purge_entity_cascading_cache,
-                )
-
-                # Get entity keys from kwargs or entity parameter
-                entity_keys = {}
-                partition_key = args[0].context.get("partition_key") or kwargs.get(
-                    "partition_key"
-                )
-
-                # Try to get from entity parameter first (for updates)
-                entity = kwargs.get("entity")
-                if entity:
-                    entity_keys["module_name"] = getattr(entity, "module_name", None)
-
-                # Fallback to kwargs (for creates/deletes)
-                if not entity_keys.get("module_name"):
-                    entity_keys["module_name"] = kwargs.get("module_name")
-
-                # Only purge if we have the required keys
-                if entity_keys.get("module_name") and partition_key:
-                    purge_entity_cascading_cache(
-                        args[0].context.get("logger"),
-                        entity_type="mcp_module",
-                        context_keys={"partition_key": partition_key},
-                        entity_keys=entity_keys,
-                        cascade_depth=3,
-                    )
-
-                    # Purge setting caches if module has classes with setting_ids
-                    try:
-                        # Extract setting_ids from entity or kwargs
-                        classes = None
-                        if entity:
-                            classes = getattr(entity, "classes", None)
-                        if not classes and "classes" in kwargs:
-                            classes = kwargs.get("classes")
-
-                        if classes:
-                            setting_ids = _extract_module_setting_ids(classes)
-                            for setting_id in setting_ids:
-                                purge_entity_cascading_cache(
-                                    args[0].context.get("logger"),
-                                    entity_type="mcp_setting",
-                                    context_keys={"partition_key": partition_key},
-                                    entity_keys={"setting_id": setting_id},
-                                    cascade_depth=3,
-                                )
-                    except Exception:
-                        pass
+                purge_mcp_module_cache(args[0], kwargs)
 
                 return result
             except Exception as e:
-                log = traceback.format_exc()
-                args[0].context.get("logger").error(log)
+                args[0].context.get("logger").exception("purge_cache failed")
                 raise e
 
         return wrapper_function
@@ -156,10 +105,9 @@ def get_mcp_module_count(partition_key: str, module_name: str) -> int:
 
 def get_mcp_module_type(info: ResolveInfo, mcp_module: MCPModuleModel) -> MCPModuleType:
     try:
-        mcp_module = mcp_module.__dict__["attribute_values"]
+        mcp_module = mcp_module.attribute_values
     except Exception as e:
-        log = traceback.format_exc()
-        info.context.get("logger").exception(log)
+        info.context.get("logger").exception("get_mcp_module_type failed")
         raise e
     return MCPModuleType(**Serializer.json_normalize(mcp_module))
 
@@ -201,7 +149,7 @@ def resolve_mcp_module_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
             count_funct = MCPModuleModel.mcp_package_index.count
 
     if module_name:
-        the_filters &= MCPModuleModel.module_name.contains(module_name)
+        the_filters = MCPModuleModel.module_name.contains(module_name)
 
     if the_filters is not None:
         args.append(the_filters)
@@ -5,7 +5,6 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import functools
-import traceback
 from typing import Any, Dict
 
 import pendulum
@@ -29,6 +28,7 @@ from silvaengine_utility.serializer import Serializer
 
 from ..handlers.config import Config
 from ..types.mcp_setting import MCPSettingListType, MCPSettingType
+from .cache import purge_mcp_setting_cache
 
 
 class MCPSettingModel(BaseModel):
@@ -52,37 +52,11 @@ def purge_cache():
                 result = original_function(*args, **kwargs)
 
                 # Then purge cache after successful operation
-                from ..models.cache import purge_entity_cascading_cache
-
-                # Get entity keys from kwargs or entity parameter
-                entity_keys = {}
-                partition_key = args[0].context.get("partition_key") or kwargs.get(
-                    "partition_key"
-                )
-
-                # Try to get from entity parameter first (for updates)
-                entity = kwargs.get("entity")
-                if entity:
-                    entity_keys["setting_id"] = getattr(entity, "setting_id", None)
-
-                # Fallback to kwargs (for creates/deletes)
-                if not entity_keys.get("setting_id"):
-                    entity_keys["setting_id"] = kwargs.get("setting_id")
-
-                # Only purge if we have the required keys
-                if entity_keys.get("setting_id") and partition_key:
-                    purge_entity_cascading_cache(
-                        args[0].context.get("logger"),
-                        entity_type="mcp_setting",
-                        context_keys={"partition_key": partition_key},
-                        entity_keys=entity_keys,
-                        cascade_depth=3,
-                    )
+                purge_mcp_setting_cache(args[0], kwargs)
 
                 return result
             except Exception as e:
-                log = traceback.format_exc()
-                args[0].context.get("logger").error(log)
+                args[0].context.get("logger").exception("purge_cache failed")
                 raise e
 
         return wrapper_function
@@ -112,10 +86,9 @@ def get_mcp_setting_type(
     info: ResolveInfo, mcp_setting: MCPSettingModel
 ) -> MCPSettingType:
     try:
-        mcp_setting = mcp_setting.__dict__["attribute_values"]
+        mcp_setting = mcp_setting.attribute_values
     except Exception as e:
-        log = traceback.format_exc()
-        info.context.get("logger").exception(log)
+        info.context.get("logger").exception("get_mcp_setting_type failed")
         raise e
     return MCPSettingType(**Serializer.json_normalize(mcp_setting))
 
@@ -148,7 +121,7 @@ def resolve_mcp_setting_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any
         inquiry_funct = MCPSettingModel.query
     the_filters = None
     if setting_id:
-        the_filters &= MCPSettingModel.setting_id.contains(setting_id)
+        the_filters = MCPSettingModel.setting_id.contains(setting_id)
     if the_filters is not None:
         args.append(the_filters)
 
@@ -9,6 +9,7 @@ from typing import Any, Dict
 from graphene import Boolean, Field, Mutation, String
 from silvaengine_utility import JSONCamelCase
 
+from ..handlers.config import Config
 from ..handlers.mcp_handlers import load_mcp_configuration_into_models
 
 
@@ -31,6 +32,9 @@ class LoadMcpConfiguration(Mutation):
         try:
             stats = load_mcp_configuration_into_models(info, **kwargs)
 
+            # Dispatch indexes of this partition are stale now
+            Config.clear_mcp_configuration_cache(info.context["partition_key"])
+
             message = (
                 f"Successfully loaded MCP configuration: "
                 f"{stats['tools']} tools, {stats['resources']} resources, "